@@ -0,0 +1,192 @@
+"""
+Benchmark the dashboard/list query access paths with and without the
+composite indexes from migration 0009.
+
+Builds a synthetic dataset in a temporary SQLite database (your real
+db.sqlite3 is never touched), then prints the query plan and the average
+timing of each query before and after the indexes are created.
+
+Usage:
+    python benchmark_indexes.py [--users 500] [--quizzes 2000] [--attempts 200000]
+"""
+import argparse
+import atexit
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from datetime import timedelta
+
+import django
+
+# Setup Django environment
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'quiz_backend.settings')
+
+from django.conf import settings
+
+TEMP_DIR = tempfile.mkdtemp(prefix='quiz_benchmark_')
+atexit.register(shutil.rmtree, TEMP_DIR, ignore_errors=True)
+settings.DATABASES['default']['NAME'] = os.path.join(TEMP_DIR, 'benchmark.sqlite3')
+django.setup()
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Avg, Max
+from django.utils import timezone
+
+from quiz_app.models import Category, Level, Subject, Quiz, Question, QuizAttempt, Answer
+
+BEFORE_MIGRATION = '0008_quiz_counters'
+AFTER_MIGRATION = '0009_access_path_indexes'
+REPEAT = 50
+
+
+def build_dataset(num_users, num_quizzes, num_attempts):
+    print(f"Building dataset: {num_users} users, {num_quizzes} quizzes, {num_attempts} attempts...")
+    now = timezone.now()
+
+    category = Category.objects.create(name='Benchmark')
+    level = Level.objects.create(name='Benchmark Level', category=category)
+    subjects = Subject.objects.bulk_create([
+        Subject(name=f'Subject {i}', level=level) for i in range(20)
+    ])
+
+    users = User.objects.bulk_create([
+        User(username=f'bench_user_{i}', password='!') for i in range(num_users)
+    ])
+
+    quizzes = Quiz.objects.bulk_create([
+        Quiz(
+            title=f'Quiz {i}',
+            category=category,
+            level=level,
+            subject=random.choice(subjects),
+            difficulty=random.choice(['easy', 'medium', 'hard']),
+            is_temporary=random.random() < 0.05,
+            created_by=random.choice(users),
+            question_count=5,
+        )
+        for i in range(num_quizzes)
+    ], batch_size=2000)
+
+    # A handful of quizzes carry real questions so answers can reference them
+    sample_quizzes = quizzes[:50]
+    questions = Question.objects.bulk_create([
+        Question(quiz=quiz, question_text='?', options=['a', 'b', 'c', 'd'], correct_answer=0, order=i)
+        for quiz in sample_quizzes for i in range(5)
+    ])
+    questions_by_quiz = {}
+    for question in questions:
+        questions_by_quiz.setdefault(question.quiz_id, []).append(question)
+
+    batch = []
+    for _ in range(num_attempts):
+        started = now - timedelta(minutes=random.randint(0, 365 * 24 * 60))
+        completed = random.random() < 0.9
+        batch.append(QuizAttempt(
+            user=random.choice(users),
+            quiz=random.choice(quizzes),
+            status='completed' if completed else 'in_progress',
+            completed_at=started + timedelta(minutes=10) if completed else None,
+            total_questions=5,
+            correct_answers=3,
+            score_percentage=random.uniform(0, 100),
+        ))
+        if len(batch) >= 5000:
+            QuizAttempt.objects.bulk_create(batch)
+            batch = []
+    QuizAttempt.objects.bulk_create(batch)
+
+    # started_at is auto_now_add, spread it out so ordering is meaningful
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "UPDATE quiz_app_quizattempt SET started_at = datetime(started_at, '-' || (abs(random()) % 525600) || ' minutes')"
+        )
+
+    answered_attempts = QuizAttempt.objects.filter(quiz__in=sample_quizzes).values_list('id', 'quiz_id')
+    answers = []
+    for attempt_id, quiz_id in answered_attempts:
+        for question in questions_by_quiz[quiz_id]:
+            answers.append(Answer(attempt_id=attempt_id, question=question, selected_option=0, is_correct=True))
+    Answer.objects.bulk_create(answers, batch_size=5000)
+
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+
+    return users, subjects
+
+
+def benchmark_queries(subjects):
+    """The access paths used by views.py: description -> queryset factory for a user"""
+    sample_attempt = Answer.objects.values_list('attempt_id', flat=True).first()
+    subject_names = [subject.name for subject in subjects[:3]]
+
+    return {
+        'Progress/recent activity (user, completed, latest first)': lambda user:
+            QuizAttempt.objects.filter(user=user, status='completed').order_by('-completed_at')[:15],
+        'Performance by category (user, completed, grouped)': lambda user:
+            QuizAttempt.objects.filter(user=user, status='completed')
+            .values('quiz__category__name')
+            .annotate(average_score=Avg('score_percentage'), highest_score=Max('score_percentage')),
+        'Quiz history (user, default ordering)': lambda user:
+            QuizAttempt.objects.filter(user=user, quiz__is_temporary=False)[:50],
+        'Recommendations (published, non-temporary, subject)': lambda user:
+            Quiz.objects.filter(is_published=True, is_temporary=False, subject__name__in=subject_names),
+        'Quiz list (published, newest first)': lambda user:
+            Quiz.objects.filter(is_published=True).order_by('-created_at')[:20],
+        'Attempt answers (attempt, answered_at)': lambda user:
+            Answer.objects.filter(attempt_id=sample_attempt),
+    }
+
+
+def run(label, users, subjects):
+    results = {}
+    sample_user = users[len(users) // 2]
+    print(f"\n===== {label} =====")
+    for name, make_query in benchmark_queries(subjects).items():
+        list(make_query(sample_user))  # warm up
+        timed_users = random.sample(users, min(REPEAT, len(users)))
+        start = time.perf_counter()
+        for user in timed_users:
+            list(make_query(user))
+        elapsed_ms = (time.perf_counter() - start) * 1000 / len(timed_users)
+        results[name] = elapsed_ms
+
+        print(f"\n{name}: {elapsed_ms:.2f} ms")
+        for line in make_query(sample_user).explain().splitlines():
+            print(f"    {line}")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=500)
+    parser.add_argument('--quizzes', type=int, default=2000)
+    parser.add_argument('--attempts', type=int, default=200000)
+    args = parser.parse_args()
+
+    random.seed(42)
+    print(f"Using temporary database in {TEMP_DIR}")
+    call_command('migrate', verbosity=0)
+    call_command('migrate', 'quiz_app', BEFORE_MIGRATION, verbosity=0)
+
+    users, subjects = build_dataset(args.users, args.quizzes, args.attempts)
+    before = run('BEFORE (0008, no composite indexes)', users, subjects)
+
+    call_command('migrate', 'quiz_app', AFTER_MIGRATION, verbosity=0)
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+    after = run('AFTER (0009 composite indexes)', users, subjects)
+
+    print("\n===== SUMMARY (average ms per query) =====")
+    for name in before:
+        speedup = before[name] / after[name] if after[name] else float('inf')
+        print(f"{name:<60} {before[name]:>9.2f} -> {after[name]:>9.2f}  ({speedup:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
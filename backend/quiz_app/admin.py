@@ -1,7 +1,8 @@
 from django.contrib import admin
 from .models import (
     Category, Level, Subject, QuizConfig, Quiz, Question,
-    QuizAttempt, Answer, UserProfile, Achievement, UserAchievement, QuizAnalytics
+    QuizAttempt, Answer, UserProfile, Achievement, UserAchievement, QuizAnalytics,
+    SubjectPerformance, XPBucket, QuizNeighbour
 )
 
 @admin.register(Category)
@@ -26,6 +27,8 @@ class UserProfileAdmin(admin.ModelAdmin):
     list_display = ['user', 'level', 'xp', 'current_streak', 'total_quizzes_taken']
     list_filter = ['level']
     search_fields = ['user__username', 'user__email']
+    # Maintained by the services and left out of full saves (see UserProfile.save)
+    readonly_fields = UserProfile.UPDATE_ONLY_FIELDS
 
 @admin.register(QuizConfig)
 class QuizConfigAdmin(admin.ModelAdmin):
@@ -77,3 +80,21 @@ class UserAchievementAdmin(admin.ModelAdmin):
 class QuizAnalyticsAdmin(admin.ModelAdmin):
     list_display = ['user', 'total_quizzes_taken', 'total_correct_answers', 'overall_accuracy', 'last_updated']
     search_fields = ['user__username']
+
+@admin.register(SubjectPerformance)
+class SubjectPerformanceAdmin(admin.ModelAdmin):
+    list_display = ['user', 'category', 'subject', 'attempt_count', 'highest_score', 'last_attempt_at']
+    list_filter = ['category']
+    search_fields = ['user__username', 'subject__name']
+
+@admin.register(XPBucket)
+class XPBucketAdmin(admin.ModelAdmin):
+    list_display = ['user', 'period', 'period_start', 'scope', 'scope_id', 'xp']
+    list_filter = ['period', 'scope']
+    search_fields = ['user__username']
+
+@admin.register(QuizNeighbour)
+class QuizNeighbourAdmin(admin.ModelAdmin):
+    list_display = ['quiz', 'neighbour', 'kind', 'score']
+    list_filter = ['kind']
+    search_fields = ['quiz__title', 'neighbour__title']
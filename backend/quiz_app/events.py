@@ -0,0 +1,160 @@
+"""
+Deferred achievement events.
+
+Write paths publish events instead of evaluating achievements inline. Events
+are collected per transaction and handed over as one batch once it commits
+(transaction.on_commit), and are processed by a single background worker,
+which drains everything queued so far as one batch: events are de-duplicated
+per user, the batch's profiles are loaded with one query and each user is
+evaluated once. Set ACHIEVEMENT_EVENTS_ASYNC = False to process events inline
+right after commit instead (management commands, scripts).
+
+A user whose evaluation fails doesn't hold up the rest of the batch; the
+runner retries their events up to EVENT_RETRIES times before giving up.
+"""
+import queue
+import threading
+from types import SimpleNamespace
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+from .models import UserProfile
+
+EVENT_RETRIES = 2
+
+
+def attempt_snapshot(attempt):
+    """The attempt fields achievement criteria look at, detached from the model instance"""
+    return {
+        'id': attempt.id,
+        'score_percentage': attempt.score_percentage,
+        'time_taken': attempt.time_taken,
+        'total_questions': attempt.total_questions,
+    }
+
+
+def publish_event(user_id, event_type, attempt=None):
+    """
+    Queue an achievement event for after the current transaction commits.
+
+    Args:
+        user_id: Id of the user the event belongs to
+        event_type: 'quiz_completed', 'streak_updated', 'level_updated' or 'quiz_created'
+        attempt: The completed QuizAttempt for 'quiz_completed' events
+    """
+    event = (user_id, event_type, attempt_snapshot(attempt) if attempt is not None else None)
+    connection = transaction.get_connection()
+    if not connection.in_atomic_block:
+        dispatch_events([event])
+        return
+
+    pending = getattr(connection, 'pending_achievement_events', None)
+    if pending is None or not _is_scheduled(connection, pending):
+        # First event of this transaction (or the previous one rolled back): one callback for all of them
+        events = []
+
+        def flush():
+            if getattr(connection, 'pending_achievement_events', None) is pending:
+                connection.pending_achievement_events = None
+            dispatch_events(events)
+
+        pending = (events, flush)
+        connection.pending_achievement_events = pending
+        # robust: the transaction has committed, a failing dispatch mustn't fail the request
+        transaction.on_commit(flush, robust=True)
+    pending[0].append(event)
+
+
+def _is_scheduled(connection, pending):
+    """Whether a batch's on_commit callback is still registered (rollbacks discard it)"""
+    return any(callback is pending[1] for _, callback, *_ in connection.run_on_commit)
+
+
+def dispatch_events(events):
+    if getattr(settings, 'ACHIEVEMENT_EVENTS_ASYNC', True):
+        runner.submit(events)
+    else:
+        process_events(events)
+
+
+def process_events(events):
+    """
+    Evaluate a batch of (user_id, event_type, attempt) events, once per user.
+
+    Returns:
+        The ids of the users whose evaluation failed
+    """
+    from .services import evaluate_achievement_events
+
+    pending = {}
+    for user_id, event_type, attempt in events:
+        event_types, attempts = pending.setdefault(user_id, (set(), {}))
+        event_types.add(event_type)
+        if attempt is not None:
+            attempts[attempt['id']] = attempt
+
+    failed = set()
+    for profile in UserProfile.objects.select_related('user').filter(user_id__in=pending):
+        event_types, attempts = pending[profile.user_id]
+        try:
+            evaluate_achievement_events(
+                profile.user, profile, event_types,
+                [SimpleNamespace(**attempt) for attempt in attempts.values()]
+            )
+        except Exception as e:
+            print(f"ERROR: Evaluating achievement events of user {profile.user_id} failed: {e}")
+            failed.add(profile.user_id)
+    return failed
+
+
+class EventRunner:
+    """Single background thread that processes published events in batches"""
+
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def submit(self, events, retries=EVENT_RETRIES):
+        self._ensure_started()
+        self._queue.put((events, retries))
+
+    def join(self):
+        """Block until every submitted event has been processed"""
+        self._queue.join()
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='achievement-events', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            chunks = [self._queue.get()]
+            # Everything queued meanwhile joins the same batch
+            while True:
+                try:
+                    chunks.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            try:
+                failed = process_events([event for events, _ in chunks for event in events])
+            except Exception as e:
+                print(f"ERROR: Processing achievement events failed: {e}")
+                failed = None
+            finally:
+                close_old_connections()
+
+            for events, retries in chunks:
+                retry = [event for event in events if failed is None or event[0] in failed]
+                if retry and retries:
+                    self._queue.put((retry, retries - 1))
+                elif retry:
+                    print(f"ERROR: Dropping {len(retry)} achievement events after {EVENT_RETRIES} retries")
+                self._queue.task_done()
+
+
+runner = EventRunner()
@@ -0,0 +1,232 @@
+"""
+In-process leaderboard index.
+
+Public profiles are kept in a list sorted by rank key (-level, -xp, user_id),
+so the top K, a user's rank and neighbours, and percentiles are bisect
+lookups. Ranking by (level, xp) orders users by total XP, since xp only
+counts the XP into the current level.
+
+The index is built from one query on first use and then updated after commit
+whenever a profile's XP, level or visibility changes (see
+schedule_leaderboard_update). Changes made by other server processes are
+picked up every LEADERBOARD_REFRESH_SECONDS by re-reading only the profiles
+whose updated_at moved since the last sync. A full rebuild, which also drops
+profiles deleted elsewhere, runs every LEADERBOARD_REBUILD_SECONDS on a
+background thread and is swapped in when done.
+
+Weekly/monthly and per-category/subject boards are read from the XPBucket
+counters instead (see scoped_leaderboard).
+"""
+import threading
+import time
+from bisect import bisect_left, insort
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import UserProfile, XPBucket
+
+LEADERBOARD_REFRESH_SECONDS = 60
+LEADERBOARD_REBUILD_SECONDS = 60 * 60
+# updated_at is set before commit, so each sync also re-reads the window before the last one
+LEADERBOARD_SYNC_OVERLAP = timedelta(seconds=LEADERBOARD_REFRESH_SECONDS)
+SCOPED_LEADERBOARD_SIZE = 100
+
+
+def rank_key(user_id, level, xp):
+    return (-level, -xp, user_id)
+
+
+class Leaderboard:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._keys = None
+        self._keys_by_user = {}
+        self._built_at = 0
+        self._synced_at = 0
+        self._synced_until = None
+        self._syncing = False
+        # Updates made while a background rebuild runs, replayed onto its result
+        self._replay = None
+
+    def _load(self):
+        """(keys_by_user, sorted keys, sync time) of every public profile"""
+        synced_until = timezone.now()
+        rows = UserProfile.objects.filter(is_public_profile=True).values_list('user_id', 'level', 'xp')
+        keys_by_user = {user_id: rank_key(user_id, level, xp) for user_id, level, xp in rows}
+        return keys_by_user, sorted(keys_by_user.values()), synced_until
+
+    def _install(self, keys_by_user, keys, synced_until):
+        self._keys_by_user = keys_by_user
+        self._keys = keys
+        self._built_at = self._synced_at = time.monotonic()
+        self._synced_until = synced_until
+
+    def _refresh(self):
+        """Build the index on first use, then sync or rebuild it once its interval has passed"""
+        with self._lock:
+            if self._keys is None:
+                # Nothing to serve yet, so the first build blocks
+                self._install(*self._load())
+                return
+            now = time.monotonic()
+            if self._syncing or now - self._synced_at < LEADERBOARD_REFRESH_SECONDS:
+                return
+            self._syncing = True
+            since = self._synced_until - LEADERBOARD_SYNC_OVERLAP
+            rebuild = now - self._built_at >= LEADERBOARD_REBUILD_SECONDS
+            if rebuild:
+                self._replay = []
+
+        if rebuild:
+            threading.Thread(target=self._rebuild, name='leaderboard-rebuild', daemon=True).start()
+            return
+        try:
+            synced_until = timezone.now()
+            rows = list(UserProfile.objects.filter(updated_at__gte=since)
+                        .values_list('user_id', 'level', 'xp', 'is_public_profile'))
+            with self._lock:
+                for user_id, level, xp, is_public in rows:
+                    self._apply(user_id, level, xp, is_public)
+                self._synced_until = synced_until
+        except Exception as e:
+            print(f"ERROR: Syncing the leaderboard failed: {e}")
+        finally:
+            with self._lock:
+                self._synced_at = time.monotonic()
+                self._syncing = False
+
+    def _rebuild(self):
+        try:
+            keys_by_user, keys, synced_until = self._load()
+            with self._lock:
+                if self._keys is not None:
+                    replay, self._replay = self._replay or [], None
+                    self._install(keys_by_user, keys, synced_until)
+                    for update in replay:
+                        self._apply(*update)
+        except Exception as e:
+            print(f"ERROR: Rebuilding the leaderboard failed: {e}")
+        finally:
+            with self._lock:
+                self._replay = None
+                self._synced_at = time.monotonic()
+                self._syncing = False
+            connection.close()
+
+    def _discard(self, user_id):
+        key = self._keys_by_user.pop(user_id, None)
+        if key is not None:
+            del self._keys[bisect_left(self._keys, key)]
+
+    def _apply(self, user_id, level, xp, is_public):
+        self._discard(user_id)
+        if is_public:
+            key = rank_key(user_id, level, xp)
+            self._keys_by_user[user_id] = key
+            insort(self._keys, key)
+
+    def update(self, user_id, level, xp, is_public=True):
+        """Move a user to their new position (or off the board if their profile isn't public)"""
+        with self._lock:
+            if self._keys is None:
+                # Not built yet; the first lookup reads the current values
+                return
+            self._apply(user_id, level, xp, is_public)
+            if self._replay is not None:
+                self._replay.append((user_id, level, xp, is_public))
+
+    def refresh_user(self, user_id):
+        """Re-read a user's profile and move them accordingly"""
+        if self._keys is None:
+            return
+        row = UserProfile.objects.filter(user_id=user_id).values_list('level', 'xp', 'is_public_profile').first()
+        if row is None:
+            self.remove(user_id)
+        else:
+            self.update(user_id, *row)
+
+    def remove(self, user_id):
+        with self._lock:
+            if self._keys is not None:
+                self._discard(user_id)
+                if self._replay is not None:
+                    self._replay.append((user_id, 0, 0, False))
+
+    def invalidate(self):
+        with self._lock:
+            self._keys = None
+            self._keys_by_user = {}
+
+    def top(self, limit):
+        """[(rank, user_id)] of the `limit` best public profiles"""
+        self._refresh()
+        with self._lock:
+            return [(index + 1, key[2]) for index, key in enumerate(self._keys[:limit])]
+
+    def around(self, user_id, level, xp, neighbours):
+        """
+        A user's standing and the public profiles ranked around them.
+
+        Users with a private profile are ranked where they would appear if it
+        were public.
+
+        Returns:
+            (rank, total, [(rank, user_id)]) with up to `neighbours` entries
+            on either side of the user.
+        """
+        self._refresh()
+        with self._lock:
+            key = self._keys_by_user.get(user_id)
+            listed = key is not None
+            if not listed:
+                key = rank_key(user_id, level, xp)
+            position = bisect_left(self._keys, key)
+            total = len(self._keys) + (0 if listed else 1)
+
+            start = max(position - neighbours, 0)
+            end = position + neighbours + (1 if listed else 0)
+            entries = [
+                (index + 1 + (0 if listed or index < position else 1), entry[2])
+                for index, entry in enumerate(self._keys[start:end], start)
+            ]
+            if not listed:
+                entries.insert(position - start, (position + 1, user_id))
+            return position + 1, total, entries
+
+
+leaderboard = Leaderboard()
+
+
+def schedule_leaderboard_update(user_id):
+    """
+    Move the user on the leaderboard once the transaction commits.
+
+    The profile is re-read then rather than taken from the caller, so a stale
+    instance can't put them at an old rank.
+    """
+    transaction.on_commit(lambda: leaderboard.refresh_user(user_id), robust=True)
+
+
+def scoped_leaderboard(period, scope='global', scope_id=0):
+    """
+    [(user_id, xp)] of the best public profiles in one XP bucket.
+
+    The top SCOPED_LEADERBOARD_SIZE rows are read off the bucket ranking
+    index and cached for LEADERBOARD_REFRESH_SECONDS.
+    """
+    period_start = XPBucket.period_start_for(period, timezone.now().date())
+    key = f"leaderboard:{period}:{period_start.isoformat()}:{scope}:{scope_id}"
+    leaders = cache.get(key)
+    if leaders is None:
+        leaders = list(
+            XPBucket.objects.filter(
+                period=period, period_start=period_start, scope=scope, scope_id=scope_id,
+                user__profile__is_public_profile=True,
+            ).order_by('-xp', 'user_id').values_list('user_id', 'xp')[:SCOPED_LEADERBOARD_SIZE]
+        )
+        cache.set(key, leaders, LEADERBOARD_REFRESH_SECONDS)
+    return leaders
+
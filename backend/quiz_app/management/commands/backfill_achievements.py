@@ -0,0 +1,19 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from quiz_app.services import backfill_achievements
+
+
+class Command(BaseCommand):
+    help = 'Award achievements that users already qualify for, e.g. after new achievements are added'
+
+    def add_arguments(self, parser):
+        parser.add_argument('user_ids', nargs='*', type=int, help='Only backfill these users')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Profiles processed per transaction')
+
+    def handle(self, *args, **options):
+        users = None
+        if options['user_ids']:
+            users = User.objects.filter(pk__in=options['user_ids'])
+
+        awarded, updated = backfill_achievements(users, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Awarded {awarded} achievements across {updated} profiles'))
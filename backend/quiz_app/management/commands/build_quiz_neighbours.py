@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from quiz_app.services import build_cooccurrence_neighbours
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the item-item "users who took this quiz also took" neighbours used by recommendations'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top-n', type=int, default=20, help='Neighbours stored per quiz')
+        parser.add_argument('--min-support', type=int, default=2, help='Minimum number of users two quizzes must share')
+        parser.add_argument('--max-items-per-user', type=int, default=200, help='Quizzes considered per user')
+        parser.add_argument('--chunk-size', type=int, default=10000, help='Rows fetched per database round trip')
+
+    def handle(self, *args, **options):
+        stored = build_cooccurrence_neighbours(
+            top_n=options['top_n'],
+            min_support=options['min_support'],
+            max_items_per_user=options['max_items_per_user'],
+            chunk_size=options['chunk_size'],
+        )
+        self.stdout.write(self.style.SUCCESS(f'Stored {stored} quiz neighbours'))
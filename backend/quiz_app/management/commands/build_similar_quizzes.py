@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from quiz_app.similarity import NEIGHBOURS, build_content_neighbours
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the question-text TF-IDF index and the similar-quizzes neighbours'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top-n', type=int, default=NEIGHBOURS, help='Neighbours stored per quiz')
+
+    def handle(self, *args, **options):
+        indexed, stored = build_content_neighbours(top_n=options['top_n'])
+        self.stdout.write(self.style.SUCCESS(f'Indexed {indexed} quizzes, stored {stored} similar-quiz links'))
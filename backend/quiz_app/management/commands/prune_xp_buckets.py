@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from quiz_app.services import prune_xp_buckets
+
+
+class Command(BaseCommand):
+    help = 'Delete the weekly/monthly leaderboard XP buckets of past periods (run once a day, e.g. from cron)'
+
+    def handle(self, *args, **options):
+        deleted = prune_xp_buckets()
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} expired XP buckets'))
@@ -0,0 +1,18 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from quiz_app.services import rebuild_subject_performance
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the per-user category/subject performance stats from quiz attempt history'
+
+    def add_arguments(self, parser):
+        parser.add_argument('user_ids', nargs='*', type=int, help='Only rebuild these users')
+
+    def handle(self, *args, **options):
+        users = None
+        if options['user_ids']:
+            users = User.objects.filter(pk__in=options['user_ids'])
+
+        created = rebuild_subject_performance(users)
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {created} subject performance rows'))
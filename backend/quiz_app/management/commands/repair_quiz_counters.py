@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from quiz_app.models import Quiz
+from quiz_app.services import rebuild_popularity_scores, refresh_quiz_counters
+
+
+class Command(BaseCommand):
+    help = 'Recompute denormalized quiz counters (questions, attempts, score aggregates, popularity)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('quiz_ids', nargs='*', type=int, help='Only repair these quizzes')
+
+    def handle(self, *args, **options):
+        quizzes = Quiz.objects.all()
+        if options['quiz_ids']:
+            quizzes = quizzes.filter(pk__in=options['quiz_ids'])
+
+        updated = refresh_quiz_counters(quizzes)
+        rebuild_popularity_scores(quizzes)
+        self.stdout.write(self.style.SUCCESS(f'Repaired counters for {updated} quizzes'))
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from quiz_app.services import reset_lapsed_streaks
+
+
+class Command(BaseCommand):
+    help = 'Reset the streak of every user who missed a day (run once a day, e.g. from cron)'
+
+    def handle(self, *args, **options):
+        reset = reset_lapsed_streaks()
+        self.stdout.write(self.style.SUCCESS(f'Reset {reset} lapsed streaks'))
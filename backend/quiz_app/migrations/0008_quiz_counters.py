@@ -0,0 +1,59 @@
+# Generated by Django 4.2.15 on 2026-10-19 05:58
+
+from django.db import migrations, models
+from django.db.models import Count, FloatField, IntegerField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def populate_quiz_counters(apps, schema_editor):
+    Quiz = apps.get_model('quiz_app', 'Quiz')
+    Question = apps.get_model('quiz_app', 'Question')
+    QuizAttempt = apps.get_model('quiz_app', 'QuizAttempt')
+
+    questions = Question.objects.filter(quiz=OuterRef('pk')).order_by().values('quiz') \
+        .annotate(total=Count('id')).values('total')
+    attempts = QuizAttempt.objects.filter(quiz=OuterRef('pk')).order_by().values('quiz') \
+        .annotate(total=Count('id')).values('total')
+    completed = QuizAttempt.objects.filter(quiz=OuterRef('pk'), status='completed').order_by().values('quiz')
+    Quiz.objects.update(
+        question_count=Coalesce(Subquery(questions, output_field=IntegerField()), Value(0)),
+        attempt_count=Coalesce(Subquery(attempts, output_field=IntegerField()), Value(0)),
+        completed_attempt_count=Coalesce(
+            Subquery(completed.annotate(total=Count('id')).values('total'), output_field=IntegerField()), Value(0)
+        ),
+        score_percentage_sum=Coalesce(
+            Subquery(completed.annotate(total=Sum('score_percentage')).values('total'), output_field=FloatField()),
+            Value(0.0)
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz_app', '0007_alter_quiz_quiz_type'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quiz',
+            name='attempt_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='quiz',
+            name='completed_attempt_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='quiz',
+            name='question_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='quiz',
+            name='score_percentage_sum',
+            field=models.FloatField(default=0.0),
+        ),
+        migrations.RunPython(populate_quiz_counters, migrations.RunPython.noop),
+    ]
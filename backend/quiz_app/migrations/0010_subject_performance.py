@@ -0,0 +1,75 @@
+# Generated by Django 4.2.15 on 2026-10-19 06:05
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import Count, Max, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def populate_subject_performance(apps, schema_editor):
+    QuizAttempt = apps.get_model('quiz_app', 'QuizAttempt')
+    SubjectPerformance = apps.get_model('quiz_app', 'SubjectPerformance')
+
+    latest = QuizAttempt.objects.filter(
+        user=OuterRef('user'),
+        quiz__category=OuterRef('quiz__category'),
+        quiz__subject=OuterRef('quiz__subject'),
+        status='completed',
+    ).order_by('-completed_at', '-id')
+    groups = QuizAttempt.objects.filter(status='completed').order_by() \
+        .values('user', 'quiz__category', 'quiz__subject').annotate(
+            attempt_count=Count('id'),
+            score_sum=Sum('score_percentage'),
+            highest_score=Max('score_percentage'),
+            time_spent=Coalesce(Sum('time_taken'), Value(0)),
+            last_attempt_id=Subquery(latest.values('id')[:1]),
+            last_score=Subquery(latest.values('score_percentage')[:1]),
+            last_attempt_at=Max('completed_at'),
+        )
+    SubjectPerformance.objects.bulk_create([
+        SubjectPerformance(
+            user_id=group['user'],
+            category_id=group['quiz__category'],
+            subject_id=group['quiz__subject'],
+            attempt_count=group['attempt_count'],
+            score_sum=group['score_sum'] or 0.0,
+            highest_score=group['highest_score'] or 0.0,
+            time_spent=group['time_spent'],
+            last_attempt_id=group['last_attempt_id'],
+            last_score=group['last_score'] or 0.0,
+            last_attempt_at=group['last_attempt_at'],
+        )
+        for group in groups.iterator()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('quiz_app', '0009_access_path_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SubjectPerformance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('attempt_count', models.IntegerField(default=0)),
+                ('score_sum', models.FloatField(default=0.0, help_text='Sum of score percentages')),
+                ('highest_score', models.FloatField(default=0.0)),
+                ('time_spent', models.IntegerField(default=0, help_text='Total time in seconds')),
+                ('last_score', models.FloatField(default=0.0)),
+                ('last_attempt_at', models.DateTimeField(blank=True, null=True)),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='quiz_app.category')),
+                ('last_attempt', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='quiz_app.quizattempt')),
+                ('subject', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='quiz_app.subject')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='subject_performance', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'unique_together': {('user', 'category', 'subject')},
+            },
+        ),
+        migrations.RunPython(populate_subject_performance, migrations.RunPython.noop),
+    ]
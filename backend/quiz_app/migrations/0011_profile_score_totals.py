@@ -0,0 +1,42 @@
+# Generated by Django 4.2.15 on 2026-10-19 06:07
+
+from django.db import migrations, models
+from django.db.models import Count, FloatField, IntegerField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def populate_profile_score_totals(apps, schema_editor):
+    UserProfile = apps.get_model('quiz_app', 'UserProfile')
+    QuizAttempt = apps.get_model('quiz_app', 'QuizAttempt')
+
+    attempts = QuizAttempt.objects.filter(user=OuterRef('user')).order_by().values('user')
+    UserProfile.objects.update(
+        total_attempts=Coalesce(
+            Subquery(attempts.annotate(total=Count('id')).values('total'), output_field=IntegerField()), Value(0)
+        ),
+        score_percentage_sum=Coalesce(
+            Subquery(attempts.annotate(total=Sum('score_percentage')).values('total'), output_field=FloatField()),
+            Value(0.0)
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz_app', '0010_subject_performance'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprofile',
+            name='score_percentage_sum',
+            field=models.FloatField(default=0.0),
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='total_attempts',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(populate_profile_score_totals, migrations.RunPython.noop),
+    ]
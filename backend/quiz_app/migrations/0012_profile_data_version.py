@@ -0,0 +1,18 @@
+# Generated by Django 4.2.15 on 2026-10-19 06:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz_app', '0011_profile_score_totals'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprofile',
+            name='data_version',
+            field=models.IntegerField(default=0),
+        ),
+    ]
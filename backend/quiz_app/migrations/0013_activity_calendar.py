@@ -0,0 +1,55 @@
+# Generated by Django 4.2.15 on 2026-10-19 06:11
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models.functions import TruncDate
+
+
+def populate_activity_calendars(apps, schema_editor):
+    User = apps.get_model('auth', 'User')
+    QuizAttempt = apps.get_model('quiz_app', 'QuizAttempt')
+    ActivityCalendar = apps.get_model('quiz_app', 'ActivityCalendar')
+
+    days_by_user = {}
+    active_days = QuizAttempt.objects.filter(
+        status='completed', quiz__is_temporary=False, completed_at__isnull=False
+    ).annotate(day=TruncDate('completed_at')).values_list('user_id', 'day').distinct()
+    for user_id, day in active_days:
+        days_by_user.setdefault(user_id, []).append(day)
+
+    joined = dict(User.objects.filter(pk__in=days_by_user).values_list('pk', 'date_joined'))
+    calendars = []
+    for user_id, days in days_by_user.items():
+        start_date = min(min(days), joined[user_id].date())
+        bits = 0
+        for day in days:
+            bits |= 1 << (day - start_date).days
+        calendars.append(ActivityCalendar(
+            user_id=user_id,
+            start_date=start_date,
+            days=bits.to_bytes((bits.bit_length() + 7) // 8, 'little'),
+        ))
+    ActivityCalendar.objects.bulk_create(calendars, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('quiz_app', '0012_profile_data_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ActivityCalendar',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('start_date', models.DateField()),
+                ('days', models.BinaryField(default=bytes)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='activity_calendar', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.RunPython(populate_activity_calendars, migrations.RunPython.noop),
+    ]
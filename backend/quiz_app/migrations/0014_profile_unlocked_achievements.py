@@ -0,0 +1,33 @@
+# Generated by Django 4.2.15 on 2026-10-19 06:14
+
+from django.db import migrations, models
+
+
+def populate_unlocked_achievement_ids(apps, schema_editor):
+    UserProfile = apps.get_model('quiz_app', 'UserProfile')
+    UserAchievement = apps.get_model('quiz_app', 'UserAchievement')
+
+    unlocked = {}
+    for user_id, achievement_id in UserAchievement.objects.values_list('user_id', 'achievement_id'):
+        unlocked.setdefault(user_id, []).append(achievement_id)
+
+    profiles = list(UserProfile.objects.filter(user_id__in=unlocked))
+    for profile in profiles:
+        profile.unlocked_achievement_ids = sorted(unlocked[profile.user_id])
+    UserProfile.objects.bulk_update(profiles, ['unlocked_achievement_ids'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz_app', '0013_activity_calendar'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprofile',
+            name='unlocked_achievement_ids',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.RunPython(populate_unlocked_achievement_ids, migrations.RunPython.noop),
+    ]
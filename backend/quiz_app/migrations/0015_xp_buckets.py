@@ -0,0 +1,74 @@
+# Generated by Django 4.2.15 on 2026-10-19 06:22
+
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import Sum
+from django.utils import timezone
+
+
+def populate_xp_buckets(apps, schema_editor):
+    QuizAttempt = apps.get_model('quiz_app', 'QuizAttempt')
+    XPBucket = apps.get_model('quiz_app', 'XPBucket')
+
+    today = timezone.now().date()
+    periods = [
+        ('week', today - timedelta(days=today.weekday())),
+        ('month', today.replace(day=1)),
+        ('all', date(2000, 1, 1)),
+    ]
+    scopes = [('global', None), ('category', 'quiz__category'), ('subject', 'quiz__subject')]
+    completed = QuizAttempt.objects.filter(
+        status='completed', quiz__is_temporary=False, completed_at__isnull=False, xp_earned__gt=0
+    ).order_by()
+
+    buckets = []
+    for period, period_start in periods:
+        attempts = completed
+        if period != 'all':
+            attempts = attempts.filter(completed_at__date__gte=period_start)
+        for scope, scope_field in scopes:
+            if period == 'all' and scope == 'global':
+                # All-time global standings come from the profiles
+                continue
+            group_fields = ['user'] + ([scope_field] if scope_field else [])
+            for group in attempts.values(*group_fields).annotate(total=Sum('xp_earned')).iterator():
+                buckets.append(XPBucket(
+                    user_id=group['user'],
+                    period=period,
+                    period_start=period_start,
+                    scope=scope,
+                    scope_id=group[scope_field] if scope_field else 0,
+                    xp=group['total'],
+                ))
+    XPBucket.objects.bulk_create(buckets, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('quiz_app', '0014_profile_unlocked_achievements'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='XPBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.CharField(choices=[('week', 'week'), ('month', 'month'), ('all', 'all')], max_length=10)),
+                ('period_start', models.DateField()),
+                ('scope', models.CharField(choices=[('global', 'global'), ('category', 'category'), ('subject', 'subject')], max_length=10)),
+                ('scope_id', models.IntegerField(default=0, help_text='Category/subject id, 0 for the global scope')),
+                ('xp', models.IntegerField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='xp_buckets', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['period', 'period_start', 'scope', 'scope_id', '-xp'], name='xpbucket_ranking_idx')],
+                'unique_together': {('period', 'period_start', 'scope', 'scope_id', 'user')},
+            },
+        ),
+        migrations.RunPython(populate_xp_buckets, migrations.RunPython.noop),
+    ]
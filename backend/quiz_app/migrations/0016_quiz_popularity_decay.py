@@ -0,0 +1,42 @@
+# Generated by Django 4.2.15 on 2026-10-19 06:25
+
+from datetime import datetime, timedelta, timezone
+
+from django.db import migrations, models
+
+
+def populate_popularity_scores(apps, schema_editor):
+    Quiz = apps.get_model('quiz_app', 'Quiz')
+    QuizAttempt = apps.get_model('quiz_app', 'QuizAttempt')
+
+    epoch = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    half_life = timedelta(days=7)
+    scores = {}
+    completions = QuizAttempt.objects.filter(status='completed', completed_at__isnull=False) \
+        .order_by().values_list('quiz_id', 'completed_at')
+    for quiz_id, completed_at in completions.iterator():
+        scores[quiz_id] = scores.get(quiz_id, 0.0) + 2 ** ((completed_at - epoch) / half_life)
+
+    Quiz.objects.update(popularity_score=0.0)
+    quizzes = [Quiz(pk=quiz_id, popularity_score=score) for quiz_id, score in scores.items()]
+    Quiz.objects.bulk_update(quizzes, ['popularity_score'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz_app', '0015_xp_buckets'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='quiz',
+            name='popularity_score',
+            field=models.FloatField(default=0.0),
+        ),
+        migrations.AddIndex(
+            model_name='quiz',
+            index=models.Index(fields=['-popularity_score'], name='quiz_popularity_idx'),
+        ),
+        migrations.RunPython(populate_popularity_scores, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.15 on 2026-10-19 06:26
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz_app', '0016_quiz_popularity_decay'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuizNeighbour',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('cooccurrence', 'cooccurrence')], max_length=20)),
+                ('score', models.FloatField()),
+                ('neighbour', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='quiz_app.quiz')),
+                ('quiz', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='neighbours', to='quiz_app.quiz')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['kind', 'quiz', '-score'], name='neighbour_quiz_score_idx')],
+                'unique_together': {('kind', 'quiz', 'neighbour')},
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 4.2.15 on 2026-10-19 06:29
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz_app', '0017_quiz_neighbours'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='quizneighbour',
+            name='kind',
+            field=models.CharField(choices=[('cooccurrence', 'cooccurrence'), ('content', 'content')], max_length=20),
+        ),
+        migrations.CreateModel(
+            name='QuizTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=50)),
+                ('weight', models.FloatField()),
+                ('quiz', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='terms', to='quiz_app.quiz')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['term'], name='quizterm_term_idx')],
+                'unique_together': {('quiz', 'term')},
+            },
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 4.2.15 on 2026-10-19 07:02
+
+from django.db import migrations
+from django.db.models.functions import TruncDate
+
+
+def add_temporary_quiz_days(apps, schema_editor):
+    User = apps.get_model('auth', 'User')
+    QuizAttempt = apps.get_model('quiz_app', 'QuizAttempt')
+    ActivityCalendar = apps.get_model('quiz_app', 'ActivityCalendar')
+
+    days_by_user = {}
+    active_days = QuizAttempt.objects.filter(
+        status='completed', quiz__is_temporary=True, completed_at__isnull=False
+    ).annotate(day=TruncDate('completed_at')).values_list('user_id', 'day').distinct()
+    for user_id, day in active_days:
+        days_by_user.setdefault(user_id, []).append(day)
+
+    calendars = {calendar.user_id: calendar for calendar in ActivityCalendar.objects.filter(user_id__in=days_by_user)}
+    joined = dict(User.objects.filter(pk__in=days_by_user).values_list('pk', 'date_joined'))
+    new_calendars = []
+    for user_id, days in days_by_user.items():
+        calendar = calendars.get(user_id)
+        if calendar is None:
+            calendar = ActivityCalendar(user_id=user_id, start_date=joined[user_id].date(), days=b'')
+            new_calendars.append(calendar)
+
+        bits = int.from_bytes(bytes(calendar.days), 'little')
+        start_date = min(min(days), calendar.start_date)
+        bits <<= (calendar.start_date - start_date).days
+        for day in days:
+            bits |= 1 << (day - start_date).days
+        calendar.start_date = start_date
+        calendar.days = bits.to_bytes((bits.bit_length() + 7) // 8, 'little')
+
+    ActivityCalendar.objects.bulk_update(list(calendars.values()), ['start_date', 'days'], batch_size=1000)
+    ActivityCalendar.objects.bulk_create(new_calendars, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz_app', '0018_quiz_content_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_temporary_quiz_days, migrations.RunPython.noop),
+    ]
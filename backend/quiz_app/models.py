@@ -1,3 +1,5 @@
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+
 from django.db import models
 from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator, MaxValueValidator
@@ -64,6 +66,19 @@ class UserProfile(models.Model):
     total_quizzes_created = models.IntegerField(default=0)
     total_correct_answers = models.IntegerField(default=0)
     total_questions_answered = models.IntegerField(default=0)
+
+    # Running score totals over every attempt started (unfinished ones score 0),
+    # maintained by the start/submit paths so average_score needs no query
+    total_attempts = models.IntegerField(default=0)
+    score_percentage_sum = models.FloatField(default=0.0)
+
+    # Bumped (only ever with F() updates) whenever data shown on the user's
+    # profile/dashboard changes; part of the per-user response cache key
+    data_version = models.IntegerField(default=0)
+
+    # Ids of unlocked achievements, mirroring UserAchievement so evaluating
+    # achievements needs no query (written by services.unlock_achievements)
+    unlocked_achievement_ids = models.JSONField(default=list, blank=True)
     
     # Streak tracking
     current_streak = models.IntegerField(default=0)
@@ -87,23 +102,51 @@ class UserProfile(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # Leaderboard sync: profiles changed since the last one
+            models.Index(fields=['updated_at'], name='profile_updated_idx'),
+        ]
+
     def __str__(self):
         return f"{self.user.username}'s profile"
 
+    # Counters owned by the services: only written with queryset updates or explicit update_fields
+    UPDATE_ONLY_FIELDS = (
+        'level', 'xp', 'xp_to_next_level',
+        'total_quizzes_taken', 'total_quizzes_created', 'total_correct_answers', 'total_questions_answered',
+        'total_attempts', 'score_percentage_sum',
+        'current_streak', 'longest_streak', 'last_quiz_date',
+        'data_version', 'unlocked_achievement_ids',
+    )
+
+    def save(self, *args, **kwargs):
+        # Leave UPDATE_ONLY_FIELDS out of full saves so a stale instance (e.g. a settings PATCH
+        # racing a submit) can't roll them back
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.UPDATE_ONLY_FIELDS
+            ]
+        super().save(*args, **kwargs)
+
     @property
     def average_score(self):
-        """Calculate average score from all quiz attempts"""
-        attempts = self.user.quiz_attempts.all()
-        if not attempts:
+        """Average score over all quiz attempts, unfinished attempts counting as 0"""
+        if not self.total_attempts:
             return 0
-        total_score = sum(attempt.score_percentage for attempt in attempts)
-        return round(total_score / len(attempts), 1)
+        return round(self.score_percentage_sum / self.total_attempts, 1)
 
     def update_streak(self, today=None):
         """
         Update the user's streak based on the last activity date.
         This method should be called *after* a quiz is taken.
         """
+        self.apply_streak(today)
+        self.save(update_fields=['current_streak', 'longest_streak', 'last_quiz_date', 'updated_at'])
+
+    def apply_streak(self, today=None):
+        """Same as update_streak, but only sets the fields without saving"""
         if today is None:
             today = timezone.now().date()
 
@@ -127,30 +170,50 @@ class UserProfile(models.Model):
             self.longest_streak = self.current_streak
         
         self.last_quiz_date = today
-        self.save()
 
-    def check_streak(self, today=None):
+    def get_effective_streak(self, today=None):
         """
-        Check if the streak is broken and reset it if necessary.
-        This method should be called when fetching user profile, before taking a quiz.
+        Current streak as of today, without saving.
+
+        A streak lapses once a full day passes without a quiz; the stored value
+        is only reset by the nightly `reset_streaks` command, so read paths use
+        this instead.
         """
         if today is None:
             today = timezone.now().date()
-        
-        if self.last_quiz_date:
-            days_diff = (today - self.last_quiz_date).days
-            if days_diff > 1:
-                self.current_streak = 0
-                self.save()
+
+        if not self.last_quiz_date or (today - self.last_quiz_date).days > 1:
+            return 0
+        return self.current_streak
+
+    @property
+    def effective_streak(self):
+        return self.get_effective_streak()
 
     def add_xp(self, xp_amount):
         """Add XP and handle level ups"""
-        self.xp += xp_amount
-        while self.xp >= self.xp_to_next_level:
-            self.xp -= self.xp_to_next_level
-            self.level += 1
-            self.xp_to_next_level = int(self.xp_to_next_level * 1.2)  # 20% increase
-        self.save()
+        self.apply_xp(xp_amount)
+        self.save(update_fields=['xp', 'level', 'xp_to_next_level', 'updated_at'])
+
+    def apply_xp(self, xp_amount):
+        """Add XP and handle level ups without saving"""
+        self.xp, self.level, self.xp_to_next_level = level_up(
+            self.xp + xp_amount, self.level, self.xp_to_next_level
+        )
+
+
+def level_up(xp, level, xp_to_next_level):
+    """
+    Resolve pending level ups for an XP total.
+
+    Each level needs 20% more XP than the previous one. Returns the new
+    (xp, level, xp_to_next_level) tuple; nothing is written to the database.
+    """
+    while xp >= xp_to_next_level:
+        xp -= xp_to_next_level
+        level += 1
+        xp_to_next_level = int(xp_to_next_level * 1.2)  # 20% increase
+    return xp, level, xp_to_next_level
 
 # Quiz Configuration Models
 class QuizConfig(models.Model):
@@ -205,7 +268,16 @@ class Quiz(models.Model):
     is_published = models.BooleanField(default=True)
     is_temporary = models.BooleanField(default=False)
     time_limit = models.IntegerField(null=True, blank=True, help_text="Time limit in seconds")
-    popularity_score = models.IntegerField(default=0)
+    # Forward-decayed completion count: each completion adds popularity_weight(completed_at),
+    # so ordering by it ranks by recent completions without ever decaying stored rows
+    popularity_score = models.FloatField(default=0.0)
+
+    # Denormalized counters, kept up to date by the generation and submit paths
+    # (run `manage.py repair_quiz_counters` after editing questions or attempts by hand)
+    question_count = models.IntegerField(default=0)
+    attempt_count = models.IntegerField(default=0)
+    completed_attempt_count = models.IntegerField(default=0)
+    score_percentage_sum = models.FloatField(default=0.0)
     
     created_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='created_quizzes')
     created_at = models.DateTimeField(auto_now_add=True)
@@ -214,17 +286,62 @@ class Quiz(models.Model):
     class Meta:
         ordering = ['-created_at']
         verbose_name_plural = "Quizzes"
+        # is_published/is_temporary match most rows, so no index leads with them:
+        # the list walks the created_at index and skips unpublished rows until the
+        # page is full, and recommendations are served by the subject FK index.
+        indexes = [
+            # QuizListView: published quizzes, newest first
+            models.Index(fields=['-created_at', '-id'], name='quiz_created_id_idx'),
+            # Trending: top quizzes by decayed popularity
+            models.Index(fields=['-popularity_score'], name='quiz_popularity_idx'),
+        ]
 
     def __str__(self):
         return self.title
 
+    @property
+    def trending_score(self):
+        """Completions with each weighted by 1/2 per POPULARITY_HALF_LIFE of age"""
+        weight = popularity_weight(timezone.now())
+        return self.popularity_score / weight if weight else 0.0
+
     @property
     def total_questions(self):
-        return self.questions.count()
+        return self.question_count
 
     @property
     def total_attempts(self):
-        return self.attempts.count()
+        return self.attempt_count
+
+    @property
+    def average_score(self):
+        """Average score percentage over completed attempts"""
+        if not self.completed_attempt_count:
+            return 0
+        return round(self.score_percentage_sum / self.completed_attempt_count, 1)
+
+POPULARITY_HALF_LIFE = timedelta(days=7)
+POPULARITY_EPOCH = datetime(2024, 1, 1, tzinfo=dt_timezone.utc)
+# Floats overflow at 2 ** 1024; the margin leaves room for summing the weights
+POPULARITY_MAX_EXPONENT = 1000
+
+
+def popularity_weight(moment):
+    """
+    Weight a completion at `moment` adds to Quiz.popularity_score.
+
+    Doubles every half-life, so it stays below 2 ** POPULARITY_MAX_EXPONENT
+    until about 2043. Past that (POPULARITY_EPOCH has to move forward and the
+    scores be rebuilt with `repair_quiz_counters`) it returns 0.0 and logs an
+    error instead of overflowing, so submits and listings keep working
+    without popularity.
+    """
+    exponent = (moment - POPULARITY_EPOCH) / POPULARITY_HALF_LIFE
+    if exponent > POPULARITY_MAX_EXPONENT:
+        print(f"ERROR: Popularity weight out of range at {moment}; move POPULARITY_EPOCH forward")
+        return 0.0
+    return 2 ** exponent
+
 
 class Question(models.Model):
     """Quiz question model"""
@@ -269,6 +386,12 @@ class QuizAttempt(models.Model):
 
     class Meta:
         ordering = ['-started_at']
+        indexes = [
+            # Analytics/dashboard views: a user's completed attempts, latest first
+            models.Index(fields=['user', 'status', '-completed_at'], name='attempt_user_status_done_idx'),
+            # History views: all of a user's attempts in default ordering
+            models.Index(fields=['user', '-started_at'], name='attempt_user_started_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.quiz.title} ({self.status})"
@@ -276,8 +399,13 @@ class QuizAttempt(models.Model):
     def calculate_score(self):
         """Calculate and update score based on answers"""
         correct = self.answers.filter(is_correct=True).count()
+        self.set_score(correct, self.quiz.total_questions)
+        self.save()
+
+    def set_score(self, correct, total_questions):
+        """Set score, percentage and XP from a count of correct answers (does not save)"""
         self.correct_answers = correct
-        self.total_questions = self.quiz.total_questions
+        self.total_questions = total_questions
         self.score_percentage = (correct / self.total_questions * 100) if self.total_questions > 0 else 0
         self.score = correct
         
@@ -291,7 +419,6 @@ class QuizAttempt(models.Model):
             multiplier = 2.0
         
         self.xp_earned = int(base_xp * multiplier)
-        self.save()
 
 class Answer(models.Model):
     """User's answer to a specific question"""
@@ -304,6 +431,10 @@ class Answer(models.Model):
     class Meta:
         unique_together = ['attempt', 'question']
         ordering = ['answered_at']
+        indexes = [
+            # Answers of an attempt in answer order
+            models.Index(fields=['attempt', 'answered_at'], name='answer_attempt_answered_idx'),
+        ]
 
     def __str__(self):
         return f"{self.attempt.user.username} - Q{self.question.order}"
@@ -378,3 +509,201 @@ class QuizAnalytics(models.Model):
             return 0
         return round((self.total_correct_answers / self.total_questions_answered) * 100, 1)
 
+
+
+class SubjectPerformance(models.Model):
+    """
+    Running score aggregates of a user's completed attempts in one category/subject.
+
+    Updated incrementally on every submit so the performance dashboard reads a
+    handful of rows instead of the whole attempt history. Rebuild with
+    `manage.py rebuild_subject_performance`.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='subject_performance')
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='+')
+    subject = models.ForeignKey(Subject, on_delete=models.CASCADE, related_name='+')
+
+    attempt_count = models.IntegerField(default=0)
+    score_sum = models.FloatField(default=0.0, help_text="Sum of score percentages")
+    highest_score = models.FloatField(default=0.0)
+    time_spent = models.IntegerField(default=0, help_text="Total time in seconds")
+
+    last_attempt = models.ForeignKey(QuizAttempt, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    last_score = models.FloatField(default=0.0)
+    last_attempt_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        unique_together = ['user', 'category', 'subject']
+
+    def __str__(self):
+        return f"{self.user.username} - {self.subject.name}"
+
+    @property
+    def average_score(self):
+        if not self.attempt_count:
+            return 0
+        return self.score_sum / self.attempt_count
+
+
+class XPBucket(models.Model):
+    """
+    Quiz XP a user earned in one period and scope.
+
+    Periods are the current week (from Monday), the current month and all
+    time; scopes are everything, one category or one subject (scope_id). The
+    buckets are incremented on every submit so weekly/monthly and classroom
+    leaderboards read the top rows of one bucket instead of grouping the
+    attempt history. Buckets of past weeks/months are dropped by
+    `manage.py prune_xp_buckets`.
+    """
+    PERIODS = ('week', 'month', 'all')
+    SCOPES = ('global', 'category', 'subject')
+    ALL_TIME_START = date(2000, 1, 1)
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='xp_buckets')
+    period = models.CharField(max_length=10, choices=[(period, period) for period in PERIODS])
+    period_start = models.DateField()
+    scope = models.CharField(max_length=10, choices=[(scope, scope) for scope in SCOPES])
+    scope_id = models.IntegerField(default=0, help_text="Category/subject id, 0 for the global scope")
+    xp = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ['period', 'period_start', 'scope', 'scope_id', 'user']
+        indexes = [
+            # Leaderboards: the top users of one bucket
+            models.Index(fields=['period', 'period_start', 'scope', 'scope_id', '-xp'], name='xpbucket_ranking_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} - {self.period} {self.period_start} {self.scope}:{self.scope_id}"
+
+    @classmethod
+    def period_start_for(cls, period, day):
+        """First day of the period containing `day`"""
+        if period == 'week':
+            return day - timedelta(days=day.weekday())
+        if period == 'month':
+            return day.replace(day=1)
+        return cls.ALL_TIME_START
+
+
+class QuizNeighbour(models.Model):
+    """
+    Precomputed top-N most similar quizzes of a quiz.
+
+    'cooccurrence' neighbours are quizzes completed by the same users (cosine
+    similarity over the user x quiz matrix), rebuilt offline by
+    `manage.py build_quiz_neighbours`. 'content' neighbours are quizzes with
+    similar question text (cosine over TF-IDF vectors, see similarity.py).
+    """
+    KINDS = ('cooccurrence', 'content')
+
+    quiz = models.ForeignKey(Quiz, on_delete=models.CASCADE, related_name='neighbours')
+    neighbour = models.ForeignKey(Quiz, on_delete=models.CASCADE, related_name='+')
+    kind = models.CharField(max_length=20, choices=[(kind, kind) for kind in KINDS])
+    score = models.FloatField()
+
+    class Meta:
+        unique_together = ['kind', 'quiz', 'neighbour']
+        indexes = [
+            # A quiz's neighbours, most similar first
+            models.Index(fields=['kind', 'quiz', '-score'], name='neighbour_quiz_score_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.quiz_id} -> {self.neighbour_id} ({self.kind} {self.score:.3f})"
+
+
+class QuizTerm(models.Model):
+    """
+    One term of a quiz's TF-IDF vector over its question text (see similarity.py).
+
+    Only the heaviest terms of each quiz are kept, with L2-normalized weights.
+    The term index makes it an inverted index for finding quizzes sharing
+    terms with a new one.
+    """
+    quiz = models.ForeignKey(Quiz, on_delete=models.CASCADE, related_name='terms')
+    term = models.CharField(max_length=50)
+    weight = models.FloatField()
+
+    class Meta:
+        unique_together = ['quiz', 'term']
+        indexes = [
+            models.Index(fields=['term'], name='quizterm_term_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.quiz_id}: {self.term} ({self.weight:.3f})"
+
+
+class TermFrequency(models.Model):
+    """
+    Number of indexed quizzes whose question text contains a term.
+
+    Counted over every term of a quiz, not only the ones kept as QuizTerm
+    rows, so new quizzes are weighted with the same document frequencies as
+    a full rebuild (see similarity.py).
+    """
+    term = models.CharField(max_length=50, unique=True)
+    document_count = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.term}: {self.document_count}"
+
+
+class ActivityCalendar(models.Model):
+    """
+    Days on which a user completed a quiz (temporary quizzes included), one bit per day.
+
+    Bit i of `days` (little-endian) stands for start_date + i days, so a year
+    of activity fits in 46 bytes. Set at submit time; the activity history is
+    read from it with bit operations instead of scanning attempts. Streaks
+    come from the profile (UserProfile.get_effective_streak).
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='activity_calendar')
+    start_date = models.DateField()
+    days = models.BinaryField(default=bytes)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.user.username}'s activity calendar"
+
+    @property
+    def bits(self):
+        return int.from_bytes(bytes(self.days), 'little')
+
+    def _index(self, day):
+        return (day - self.start_date).days
+
+    def is_active(self, day):
+        index = self._index(day)
+        return index >= 0 and bool(self.bits >> index & 1)
+
+    def mark(self, day):
+        """Set the bit for `day` (does not save). Returns False if it was already set."""
+        bits = self.bits
+        index = self._index(day)
+        if index < 0:
+            # Activity before start_date: move the start back
+            bits <<= -index
+            self.start_date = day
+            index = 0
+        if bits >> index & 1:
+            return False
+        bits |= 1 << index
+        self.days = bits.to_bytes((bits.bit_length() + 7) // 8, 'little')
+        return True
+
+    def active_days(self, start=None, end=None):
+        """Active dates between start and end (inclusive), newest first"""
+        first = 0 if start is None else max(self._index(start), 0)
+        last = self._index(end) if end is not None else self.bits.bit_length() - 1
+        if last < first:
+            return []
+        window = self.bits >> first & ((1 << (last - first + 1)) - 1)
+        active = []
+        while window:
+            offset = window.bit_length() - 1
+            active.append(self.start_date + timedelta(days=first + offset))
+            window ^= 1 << offset
+        return active
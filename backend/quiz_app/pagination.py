@@ -0,0 +1,86 @@
+import base64
+from datetime import datetime
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset (seek) pagination on a (timestamp, id) pair, newest first.
+
+    The cursor encodes the last row of the previous page, so each page is a
+    bounded index range scan no matter how deep the client has paged. Works on
+    querysets and on values() projections as long as both ordering fields are
+    selected.
+    """
+    ordering_field = 'created_at'
+    page_size = 20
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+
+    def __init__(self, ordering_field=None):
+        if ordering_field:
+            self.ordering_field = ordering_field
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except (TypeError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def encode_cursor(self, row):
+        if isinstance(row, dict):
+            timestamp, pk = row[self.ordering_field], row['id']
+        else:
+            timestamp, pk = getattr(row, self.ordering_field), row.pk
+        raw = f"{timestamp.isoformat()}|{pk}"
+        return base64.urlsafe_b64encode(raw.encode()).decode()
+
+    def decode_cursor(self, cursor):
+        try:
+            raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+            timestamp, pk = raw.rsplit('|', 1)
+            return datetime.fromisoformat(timestamp), int(pk)
+        except (TypeError, ValueError, UnicodeDecodeError):
+            raise NotFound('Invalid cursor')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size_value = self.get_page_size(request)
+        self.has_cursor = bool(request.query_params.get(self.cursor_query_param))
+
+        queryset = queryset.order_by(f'-{self.ordering_field}', '-id')
+        if self.has_cursor:
+            timestamp, pk = self.decode_cursor(request.query_params[self.cursor_query_param])
+            queryset = queryset.filter(
+                Q(**{f'{self.ordering_field}__lt': timestamp}) |
+                Q(**{self.ordering_field: timestamp, 'id__lt': pk})
+            )
+
+        # Fetch one extra row to know whether there is a next page
+        rows = list(queryset[:self.page_size_value + 1])
+        self.has_next = len(rows) > self.page_size_value
+        rows = rows[:self.page_size_value]
+        self.next_cursor = self.encode_cursor(rows[-1]) if self.has_next else None
+        return rows
+
+    def get_next_link(self):
+        if not self.next_cursor:
+            return None
+        return replace_query_param(
+            self.request.build_absolute_uri(), self.cursor_query_param, self.next_cursor
+        )
+
+    def get_paginated_response(self, data, **extra):
+        return Response({
+            'next': self.get_next_link(),
+            'next_cursor': self.next_cursor,
+            'results': data,
+            **extra,
+        })
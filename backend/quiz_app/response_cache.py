@@ -0,0 +1,64 @@
+"""
+Per-user response cache.
+
+Entries are keyed on (endpoint, user, data version, day, query string). The
+write paths bump UserProfile.data_version (see services.bump_data_version),
+so a changed user simply stops hitting the old entries and no explicit
+invalidation is needed. The day is part of the key because streaks expire
+with the date. Memory is bounded by the cache backend (CACHES in settings).
+"""
+import hashlib
+from functools import wraps
+
+from django.core.cache import cache
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import UserProfile
+
+USER_RESPONSE_CACHE_TIMEOUT = 60 * 60
+
+
+def user_cache_key(endpoint, user, variant=''):
+    """Cache key for `endpoint` at the user's current data version, or None without a profile"""
+    try:
+        version = user.profile.data_version
+    except UserProfile.DoesNotExist:
+        return None
+    digest = hashlib.md5(variant.encode()).hexdigest() if variant else ''
+    return f"user-response:{endpoint}:{user.pk}:{version}:{timezone.now().date().isoformat()}:{digest}"
+
+
+def get_user_cached(endpoint, user, build, variant=''):
+    """Return build() for the user, computing it only on a cache miss"""
+    key = user_cache_key(endpoint, user, variant)
+    if key is None:
+        return build()
+    data = cache.get(key)
+    if data is None:
+        data = build()
+        cache.set(key, data, USER_RESPONSE_CACHE_TIMEOUT)
+    return data
+
+
+def cache_user_response(handler):
+    """
+    Cache a view's GET handler per user and data version.
+
+    The view class name and the full request path form the endpoint part of
+    the key; only 200 responses are stored.
+    """
+    @wraps(handler)
+    def wrapper(view, request, *args, **kwargs):
+        key = user_cache_key(type(view).__name__, request.user, request.get_full_path())
+        if key is not None:
+            data = cache.get(key)
+            if data is not None:
+                return Response(data)
+
+        response = handler(view, request, *args, **kwargs)
+        if key is not None and response.status_code == status.HTTP_200_OK:
+            cache.set(key, response.data, USER_RESPONSE_CACHE_TIMEOUT)
+        return response
+    return wrapper
@@ -38,6 +38,7 @@ class UserProfileSerializer(serializers.ModelSerializer):
     username = serializers.CharField(source='user.username', read_only=True)
     email = serializers.EmailField(source='user.email', read_only=True)
     average_score = serializers.ReadOnlyField()
+    current_streak = serializers.IntegerField(source='effective_streak', read_only=True)
 
     class Meta:
         model = UserProfile
@@ -115,6 +116,7 @@ class QuizSerializer(serializers.ModelSerializer):
     created_by_username = serializers.CharField(source='created_by.username', read_only=True)
     total_questions = serializers.ReadOnlyField()
     total_attempts = serializers.ReadOnlyField()
+    average_score = serializers.ReadOnlyField()
 
     class Meta:
         model = Quiz
@@ -123,7 +125,7 @@ class QuizSerializer(serializers.ModelSerializer):
             'level', 'level_name', 'subject', 'subject_name', 'difficulty',
             'quiz_type', 'uploaded_file', 'is_ai_generated', 'is_published',
             'time_limit', 'created_by', 'created_by_username', 'created_at',
-            'updated_at', 'questions', 'total_questions', 'total_attempts'
+            'updated_at', 'questions', 'total_questions', 'total_attempts', 'average_score'
         ]
         read_only_fields = ['created_by', 'created_at', 'updated_at']
 
@@ -134,13 +136,15 @@ class QuizListSerializer(serializers.ModelSerializer):
     subject_name = serializers.CharField(source='subject.name', read_only=True)
     created_by_username = serializers.CharField(source='created_by.username', read_only=True)
     total_questions = serializers.ReadOnlyField()
+    total_attempts = serializers.ReadOnlyField()
+    average_score = serializers.ReadOnlyField()
 
     class Meta:
         model = Quiz
         fields = [
             'id', 'title', 'category_details', 'level_name', 'subject_name',
             'difficulty', 'quiz_type', 'is_published', 'created_by_username',
-            'created_at', 'total_questions'
+            'created_at', 'total_questions', 'total_attempts', 'average_score'
         ]
 
 class QuizTakeSerializer(serializers.ModelSerializer):
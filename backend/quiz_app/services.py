@@ -1,90 +1,904 @@
+import hashlib
+import heapq
+import math
+import time
+from bisect import bisect_left, bisect_right
+from datetime import timedelta
+from itertools import combinations, groupby
+from types import SimpleNamespace
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, FloatField, IntegerField, Max, Min, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Greatest
 from django.utils import timezone
-from .models import Achievement, UserAchievement, UserProfile, QuizAttempt
+from .models import (
+    Achievement, UserAchievement, UserProfile, QuizAttempt, Quiz, Question, Answer,
+    QuizAnalytics, SubjectPerformance, ActivityCalendar, XPBucket, QuizNeighbour, popularity_weight
+)
+from .events import publish_event
+from .leaderboard import schedule_leaderboard_update
+from .similarity import index_quiz_content
+
+ACHIEVEMENT_CRITERIA_BY_EVENT = {
+    'quiz_completed': ['quizzes_taken', 'perfect_score', 'fast_quiz'],
+    'streak_updated': ['streak_days'],
+    'quiz_created': ['quizzes_created'],
+    'level_updated': ['level_reached'],
+}
+
+# Other processes (admin, seed_badges.py, other workers) change achievements
+# without this process's signals firing, so the catalog is also reloaded
+# every ACHIEVEMENT_CATALOG_REFRESH_SECONDS
+ACHIEVEMENT_CATALOG_REFRESH_SECONDS = 60
+
+_achievement_catalog = None
+
+
+def _load_achievement_catalog():
+    global _achievement_catalog
+    if _achievement_catalog is None or \
+            time.monotonic() - _achievement_catalog[0] >= ACHIEVEMENT_CATALOG_REFRESH_SECONDS:
+        fields = [field.attname for field in Achievement._meta.concrete_fields]
+        digest = hashlib.md5()
+        grouped = {}
+        for achievement in Achievement.objects.order_by('criteria_value', 'id'):
+            digest.update(repr([getattr(achievement, field) for field in fields]).encode())
+            grouped.setdefault(achievement.criteria_type, []).append(achievement)
+        catalog = {
+            criteria_type: ([achievement.criteria_value for achievement in achievements], achievements)
+            for criteria_type, achievements in grouped.items()
+        }
+        _achievement_catalog = (time.monotonic(), digest.hexdigest(), catalog)
+    return _achievement_catalog
+
+
+def get_achievement_catalog():
+    """
+    All achievements grouped by criteria_type, cached per process.
+
+    Maps criteria_type to (thresholds, achievements), both sorted by
+    criteria_value. Dropped by invalidate_achievement_catalog() whenever an
+    Achievement is saved or deleted in this process and reloaded after
+    ACHIEVEMENT_CATALOG_REFRESH_SECONDS otherwise.
+    """
+    return _load_achievement_catalog()[2]
+
+
+def achievement_catalog_version():
+    """Digest of the catalog's contents, for keys of cached responses built from it"""
+    return _load_achievement_catalog()[1]
+
+
+def invalidate_achievement_catalog():
+    global _achievement_catalog
+    _achievement_catalog = None
+
+
+def eligible_achievements(criteria_type, profile, context):
+    """Achievements of one criteria type whose condition the profile/event meets"""
+    thresholds, achievements = get_achievement_catalog().get(criteria_type, ([], []))
+    attempt = context.get('attempt')
+
+    if criteria_type == 'quizzes_taken':
+        return achievements[:bisect_right(thresholds, profile.total_quizzes_taken)]
+    if criteria_type == 'streak_days':
+        # "Maintain a X-day streak" counts once reached, so the longest streak counts too
+        return achievements[:bisect_right(thresholds, max(profile.current_streak, profile.longest_streak))]
+    if criteria_type == 'quizzes_created':
+        return achievements[:bisect_right(thresholds, profile.total_quizzes_created)]
+    if criteria_type == 'level_reached':
+        return achievements[:bisect_right(thresholds, profile.level)]
+    if criteria_type == 'perfect_score':
+        # Triggers on the event of scoring 100% on a quiz
+        return achievements if attempt and attempt.score_percentage == 100 else []
+    if criteria_type == 'fast_quiz':
+        # Only real quizzes (at least 5 questions) finished within the time limit
+        if attempt and attempt.time_taken and attempt.total_questions >= 5:
+            return achievements[bisect_left(thresholds, attempt.time_taken):]
+        return []
+    return []
+
+
+def achievement_progress(profile):
+    """
+    Progress of the profile towards every achievement, ordered by id.
+
+    Counter criteria report the matching profile counter; event criteria
+    (perfect_score, fast_quiz) can't be partially met, so they report the
+    threshold once unlocked and 0 before. Reads only the cached catalog and
+    the profile.
+
+    Returns:
+        A list of (achievement, current_value, unlocked) tuples.
+    """
+    counters = {
+        'quizzes_taken': profile.total_quizzes_taken,
+        'streak_days': max(profile.effective_streak, profile.longest_streak),
+        'quizzes_created': profile.total_quizzes_created,
+        'level_reached': profile.level,
+    }
+    unlocked = set(profile.unlocked_achievement_ids)
+    progress = []
+    for criteria_type, (thresholds, achievements) in get_achievement_catalog().items():
+        for achievement in achievements:
+            is_unlocked = achievement.id in unlocked
+            if criteria_type in counters:
+                current = counters[criteria_type]
+            else:
+                current = achievement.criteria_value if is_unlocked else 0
+            progress.append((achievement, current, is_unlocked))
+    progress.sort(key=lambda item: item[0].id)
+    return progress
+
 
-def check_achievements(user, event_type, context=None):
+def _achievement_candidates(profile, event_type, context, unlocked):
+    return [
+        achievement
+        for criteria_type in ACHIEVEMENT_CRITERIA_BY_EVENT.get(event_type, [])
+        for achievement in eligible_achievements(criteria_type, profile, context)
+        if achievement.id not in unlocked
+    ]
+
+
+def check_achievements(user, event_type, context=None, profile=None):
     """
     Evaluate achievements for a user based on an event.
-    
+
+    Evaluation runs against the in-process catalog and the profile's
+    unlocked_achievement_ids, so it needs no queries unless something unlocks.
+
     Args:
         user: The User instance
         event_type: String identifier for the event (e.g., 'quiz_completed', 'streak_updated')
         context: Dictionary containing additional data (e.g., {'attempt': attempt_instance})
+        profile: The user's profile, if the caller already holds a fresher instance than user.profile
+
+    Returns:
+        The list of newly unlocked achievements.
     """
     if context is None:
         context = {}
-        
-    profile = user.profile
-    
-    # 1. Fetch relevant achievements based on event_type to optimize
-    # For simplicity, we might fetch all relevant criteria types
-    # or mapp event_type to criteria_type.
-    
-    criteria_map = {
-        'quiz_completed': ['quizzes_taken', 'perfect_score', 'fast_quiz'],
-        'streak_updated': ['streak_days'],
-        'quiz_created': ['quizzes_created'],
-        'level_updated': ['level_reached']
-    }
-    
-    relevant_criteria = criteria_map.get(event_type, [])
-    if not relevant_criteria:
-        return
+    if profile is None:
+        profile = user.profile
+
+    candidates = _achievement_candidates(profile, event_type, context, set(profile.unlocked_achievement_ids))
+    if not candidates:
+        return []
+    return unlock_achievements(user, profile, candidates)
 
-    # Fetch locked achievements with these criteria
-    # We exclude achievements the user already has
-    existing_achievement_ids = UserAchievement.objects.filter(user=user).values_list('achievement_id', flat=True)
-    
-    potential_achievements = Achievement.objects.filter(
-        criteria_type__in=relevant_criteria
-    ).exclude(id__in=existing_achievement_ids)
 
+def evaluate_achievement_events(user, profile, event_types, attempts=()):
+    """
+    Evaluate a user's batch of deferred events (see events.py) in one unlock.
+
+    quiz_completed is evaluated once per completed attempt; every other event
+    type once against the profile.
+
+    Returns:
+        The list of newly unlocked achievements.
+    """
+    unlocked = set(profile.unlocked_achievement_ids)
+    candidates = {}
+    for event_type in event_types:
+        contexts = [{}]
+        if event_type == 'quiz_completed' and attempts:
+            contexts = [{'attempt': attempt} for attempt in attempts]
+        for context in contexts:
+            for achievement in _achievement_candidates(profile, event_type, context, unlocked):
+                candidates[achievement.id] = achievement
+    if not candidates:
+        return []
+    return unlock_achievements(user, profile, list(candidates.values()))
+
+
+def award_achievements(profile, unlocked, achievements):
+    """
+    Apply the XP of the achievements not yet in `unlocked` to the profile.
+
+    Levels gained from the rewards pull in level_reached achievements as well.
+    `unlocked` is updated in place; nothing is written to the database.
+    Returns the newly awarded achievements.
+    """
     newly_unlocked = []
+    pending = achievements
+    while pending:
+        pending = [achievement for achievement in pending if achievement.id not in unlocked]
+        newly_unlocked.extend(pending)
+        unlocked.update(achievement.id for achievement in pending)
+        level = profile.level
+        profile.apply_xp(sum(achievement.xp_reward for achievement in pending))
+        pending = eligible_achievements('level_reached', profile, {}) if profile.level != level else []
+    return newly_unlocked
 
-    for achievement in potential_achievements:
-        is_unlocked = False
-        
-        if achievement.criteria_type == 'quizzes_taken':
-            if profile.total_quizzes_taken >= achievement.criteria_value:
-                is_unlocked = True
-                
-        elif achievement.criteria_type == 'streak_days':
-            # Check current streak or longest streak? "Maintain a X-day streak" usually implies touching it once.
-            # We'll check both to be safe/generous, but usually it's current or longest.
-            if profile.current_streak >= achievement.criteria_value or profile.longest_streak >= achievement.criteria_value:
-                is_unlocked = True
-                
-        elif achievement.criteria_type == 'perfect_score':
-            # Check if this specific attempt was perfect
-            attempt = context.get('attempt')
-            if attempt and attempt.score_percentage == 100:
-                is_unlocked = True
-            # OR check if user has ANY perfect score in history (if we track count in profile, but we don't explicitly yet)
-            # For now, 'Perfect Score' triggers on the event of getting one.
-            # If user already got one before this system, this might not catch it unless valid history check.
-            # But prompt says "unlock when user scores 100% on any quiz", implying the action trigger.
-                
-        elif achievement.criteria_type == 'quizzes_created':
-            if profile.total_quizzes_created >= achievement.criteria_value:
-                is_unlocked = True
-                
-        elif achievement.criteria_type == 'fast_quiz':
-            attempt = context.get('attempt')
-            if attempt and attempt.time_taken and attempt.time_taken <= achievement.criteria_value:
-                # Also ensure it's a real quiz, e.g. min 5 questions
-                if attempt.total_questions >= 5:
-                    is_unlocked = True
-
-        elif achievement.criteria_type == 'level_reached':
-            if profile.level >= achievement.criteria_value:
-                is_unlocked = True
-
-        if is_unlocked:
-            UserAchievement.objects.create(user=user, achievement=achievement)
-            newly_unlocked.append(achievement)
-            
-            # Award XP for the achievement itself?
-            # UserProfile has add_xp method.
-            if achievement.xp_reward > 0:
-                profile.add_xp(achievement.xp_reward)
 
+def unlock_achievements(user, profile, achievements):
+    """
+    Unlock achievements and award their XP in one batch.
+
+    The profile row is locked and re-read so concurrent unlocks can't award the
+    same achievement twice. Levels gained from the XP rewards are evaluated
+    against level_reached achievements in the same batch and published as a
+    'level_updated' event for the other criteria. The new XP, level and
+    unlocked set are mirrored onto `profile`.
+    """
+    with transaction.atomic():
+        current = UserProfile.objects.select_for_update().get(pk=profile.pk)
+        previous_level = current.level
+        unlocked = set(current.unlocked_achievement_ids)
+
+        newly_unlocked = award_achievements(current, unlocked, achievements)
+        missing = {achievement.id for achievement in newly_unlocked}.difference(
+            Achievement.objects.filter(pk__in=[achievement.id for achievement in newly_unlocked])
+            .values_list('pk', flat=True)
+        )
+        if missing:
+            # Deleted since the catalog was loaded: reload it and award again without them
+            invalidate_achievement_catalog()
+            current = UserProfile.objects.select_for_update().get(pk=profile.pk)
+            unlocked = set(current.unlocked_achievement_ids)
+            newly_unlocked = award_achievements(
+                current, unlocked, [achievement for achievement in achievements if achievement.id not in missing]
+            )
+        if newly_unlocked:
+            UserAchievement.objects.bulk_create(
+                [UserAchievement(user=user, achievement=achievement) for achievement in newly_unlocked],
+                ignore_conflicts=True
+            )
+            UserProfile.objects.filter(pk=current.pk).update(
+                xp=current.xp,
+                level=current.level,
+                xp_to_next_level=current.xp_to_next_level,
+                unlocked_achievement_ids=sorted(unlocked),
+                data_version=F('data_version') + 1,
+                updated_at=timezone.now(),
+            )
+            schedule_leaderboard_update(current.user_id)
+            if current.level != previous_level:
+                publish_event(current.user_id, 'level_updated')
+
+    profile.xp = current.xp
+    profile.level = current.level
+    profile.xp_to_next_level = current.xp_to_next_level
+    profile.unlocked_achievement_ids = sorted(unlocked)
     return newly_unlocked
+
+
+def get_activity_calendar(user):
+    """The user's ActivityCalendar, or an empty unsaved one before their first quiz"""
+    try:
+        return user.activity_calendar
+    except ActivityCalendar.DoesNotExist:
+        return ActivityCalendar(user=user, start_date=user.date_joined.date())
+
+
+def bump_data_version(user):
+    """Invalidate the user's cached profile/dashboard responses"""
+    UserProfile.objects.filter(user=user).update(data_version=F('data_version') + 1)
+
+
+def _set_prefetched(instance, related_name, objects):
+    """Seed a related manager's prefetch cache so serializers don't query it again"""
+    if not hasattr(instance, '_prefetched_objects_cache'):
+        instance._prefetched_objects_cache = {}
+    queryset = getattr(instance, related_name).all()
+    queryset._result_cache = list(objects)
+    queryset._prefetch_done = True
+    instance._prefetched_objects_cache[related_name] = queryset
+
+
+def clean_question_items(questions_data):
+    """
+    Validate question dicts returned by the LLM.
+
+    Items must have a non-empty 'question', exactly 4 'options' and an integer
+    'correct_answer' between 0 and 3. Invalid items are dropped; a ValueError
+    is raised if nothing usable remains.
+    """
+    if not isinstance(questions_data, list):
+        raise ValueError("AI response is not a list of questions")
+
+    cleaned = []
+    for item in questions_data:
+        if not isinstance(item, dict):
+            continue
+        question_text = str(item.get('question') or '').strip()
+        options = item.get('options')
+        correct_answer = item.get('correct_answer')
+        if not question_text or not isinstance(options, list) or len(options) != 4:
+            continue
+        try:
+            correct_answer = int(correct_answer)
+        except (TypeError, ValueError):
+            continue
+        if not 0 <= correct_answer <= 3:
+            continue
+        cleaned.append({
+            'question': question_text,
+            'options': [str(option) for option in options],
+            'correct_answer': correct_answer,
+            'explanation': str(item.get('explanation') or ''),
+        })
+
+    if not cleaned:
+        raise ValueError("The AI response did not contain any valid questions")
+    return cleaned
+
+
+def create_quiz_with_questions(user, questions_data, **quiz_fields):
+    """
+    Persist a generated quiz and all of its questions in a single transaction.
+
+    Questions are validated up front and inserted with one bulk_create. The
+    returned quiz has its questions cached, and its attempt figures come from
+    the Quiz counters, so serializing it does not query the database again.
+
+    Args:
+        user: The User creating the quiz
+        questions_data: List of question dicts as returned by the LLM
+        **quiz_fields: Field values for the Quiz (title, category, difficulty, ...)
+    """
+    cleaned = clean_question_items(questions_data)
+
+    with transaction.atomic():
+        UserProfile.objects.filter(user=user).update(
+            total_quizzes_created=F('total_quizzes_created') + 1,
+            data_version=F('data_version') + 1,
+        )
+
+        quiz = Quiz(created_by=user, question_count=len(cleaned), **quiz_fields)
+        quiz.save()
+
+        questions = Question.objects.bulk_create([
+            Question(
+                quiz=quiz,
+                question_text=item['question'],
+                options=item['options'],
+                correct_answer=item['correct_answer'],
+                explanation=item['explanation'],
+                order=idx + 1
+            )
+            for idx, item in enumerate(cleaned)
+        ])
+        if not quiz.is_temporary:
+            # Link it with similar quizzes once committed; a failure here only leaves it unindexed
+            transaction.on_commit(lambda: index_quiz_content(quiz), robust=True)
+
+    _set_prefetched(quiz, 'questions', questions)
+    return quiz
+
+
+def grade_attempt(attempt, answers_data):
+    """
+    Grade submitted answers against the quiz's answer key in memory.
+
+    The quiz's questions are loaded once, every answer is graded without further
+    lookups and all Answer rows are written with a single bulk_create. Score,
+    percentage and XP are set on the attempt, which is NOT saved.
+    Answers for questions outside the quiz are ignored; if a question is answered
+    more than once only the first answer counts.
+
+    Args:
+        attempt: The in-progress QuizAttempt (with its quiz loaded)
+        answers_data: List of {'question_id': int, 'selected_option': int}
+
+    Returns:
+        The list of created Answer instances.
+    """
+    quiz = attempt.quiz
+    questions = list(quiz.questions.all())
+    answer_key = {question.id: question for question in questions}
+
+    answers = []
+    seen = set()
+    for answer_data in answers_data:
+        question = answer_key.get(answer_data['question_id'])
+        if question is None or question.id in seen:
+            continue
+        seen.add(question.id)
+        selected = answer_data['selected_option']
+        answers.append(Answer(
+            attempt=attempt,
+            question=question,
+            selected_option=selected,
+            is_correct=(selected == question.correct_answer)
+        ))
+
+    Answer.objects.bulk_create(answers)
+
+    correct = sum(1 for answer in answers if answer.is_correct)
+    attempt.set_score(correct, len(questions))
+
+    # Results are serialized straight from memory
+    _set_prefetched(quiz, 'questions', questions)
+    _set_prefetched(attempt, 'answers', answers)
+    return answers
+
+
+def record_attempt_stats(user, attempt, today=None):
+    """
+    Apply the profile and analytics updates for a completed attempt.
+
+    Counters are incremented with F() expressions in a single UPDATE per table,
+    so concurrent submits can't overwrite each other. XP, level and streak are
+    computed from the row read under select_for_update and only the fields that
+    actually change are written. Streak and level achievement events are
+    published explicitly since queryset updates don't send post_save.
+
+    Returns:
+        (profile, streak_lost) where profile is user.profile with the new values
+    """
+    if today is None:
+        today = timezone.now().date()
+    quiz = attempt.quiz
+    time_taken = attempt.time_taken or 0
+
+    with transaction.atomic():
+        current = UserProfile.objects.select_for_update().get(user=user)
+        old_values = {
+            'xp': current.xp,
+            'level': current.level,
+            'xp_to_next_level': current.xp_to_next_level,
+            'current_streak': current.current_streak,
+            'longest_streak': current.longest_streak,
+            'last_quiz_date': current.last_quiz_date,
+        }
+        current.apply_xp(attempt.xp_earned)
+        current.apply_streak(today)
+
+        profile_updates = {
+            'total_quizzes_taken': F('total_quizzes_taken') + 1,
+            'total_questions_answered': F('total_questions_answered') + attempt.total_questions,
+            'total_correct_answers': F('total_correct_answers') + attempt.correct_answers,
+            'score_percentage_sum': F('score_percentage_sum') + attempt.score_percentage,
+            'data_version': F('data_version') + 1,
+            'updated_at': timezone.now(),
+        }
+        for field, old_value in old_values.items():
+            new_value = getattr(current, field)
+            if new_value != old_value:
+                profile_updates[field] = new_value
+        UserProfile.objects.filter(pk=current.pk).update(**profile_updates)
+        schedule_leaderboard_update(user.pk)
+
+        difficulty_field = {
+            'easy': 'easy_quizzes_taken',
+            'medium': 'medium_quizzes_taken',
+        }.get(quiz.difficulty, 'hard_quizzes_taken')
+        updated = QuizAnalytics.objects.filter(user=user).update(**{
+            'total_quizzes_taken': F('total_quizzes_taken') + 1,
+            'total_questions_answered': F('total_questions_answered') + attempt.total_questions,
+            'total_correct_answers': F('total_correct_answers') + attempt.correct_answers,
+            difficulty_field: F(difficulty_field) + 1,
+            'total_time_spent': F('total_time_spent') + time_taken,
+            'average_quiz_time': (F('total_time_spent') + time_taken) / (F('total_quizzes_taken') + 1),
+            'last_updated': timezone.now(),
+        })
+        if not updated:
+            QuizAnalytics.objects.create(**{
+                'user': user,
+                'total_quizzes_taken': 1,
+                'total_questions_answered': attempt.total_questions,
+                'total_correct_answers': attempt.correct_answers,
+                difficulty_field: 1,
+                'total_time_spent': time_taken,
+                'average_quiz_time': time_taken,
+            })
+
+        mark_active_day(user, today)
+
+    # Mirror the committed row on the cached profile used by the caller
+    profile = user.profile
+    for field in old_values:
+        setattr(profile, field, getattr(current, field))
+    profile.total_quizzes_taken = current.total_quizzes_taken + 1
+    profile.total_questions_answered = current.total_questions_answered + attempt.total_questions
+    profile.total_correct_answers = current.total_correct_answers + attempt.correct_answers
+    profile.score_percentage_sum = current.score_percentage_sum + attempt.score_percentage
+    profile.unlocked_achievement_ids = current.unlocked_achievement_ids
+    profile.streak_was_just_reset = current.streak_was_just_reset
+
+    if profile.current_streak != old_values['current_streak']:
+        publish_event(user.pk, 'streak_updated')
+    if profile.level != old_values['level']:
+        publish_event(user.pk, 'level_updated')
+
+    return profile, current.streak_was_just_reset
+
+
+def record_attempt_started(attempt):
+    """Count a newly started attempt on its quiz and on the user's profile"""
+    Quiz.objects.filter(pk=attempt.quiz_id).update(attempt_count=F('attempt_count') + 1)
+    UserProfile.objects.filter(user_id=attempt.user_id).update(
+        total_attempts=F('total_attempts') + 1,
+        data_version=F('data_version') + 1,
+    )
+
+
+def record_profile_score(attempt):
+    """
+    Add an attempt's score to the user's running total and mark the day on
+    their activity calendar (record_attempt_stats does both itself).
+    """
+    with transaction.atomic():
+        UserProfile.objects.filter(user_id=attempt.user_id).update(
+            score_percentage_sum=F('score_percentage_sum') + attempt.score_percentage,
+            data_version=F('data_version') + 1,
+        )
+        mark_active_day(attempt.user, timezone.now().date())
+
+
+def mark_active_day(user, day):
+    """
+    Set `day` on the user's activity calendar, creating it on their first quiz.
+
+    Call inside the transaction that updated the user's profile row: that row
+    lock serializes concurrent submits of the same user.
+    """
+    calendar = ActivityCalendar.objects.select_for_update().filter(user=user).first()
+    if calendar is None:
+        calendar = ActivityCalendar(user=user, start_date=min(user.date_joined.date(), day))
+    if calendar.mark(day):
+        calendar.save()
+
+
+def reset_lapsed_streaks(today=None):
+    """
+    Zero the stored streak of every user who missed a day, in one UPDATE.
+
+    Run once a day (see the reset_streaks command). Being a queryset update it
+    sends no post_save, so no achievement checks fire. Returns the number of
+    profiles reset.
+    """
+    if today is None:
+        today = timezone.now().date()
+    return UserProfile.objects.filter(current_streak__gt=0).filter(
+        Q(last_quiz_date__lt=today - timedelta(days=1)) | Q(last_quiz_date__isnull=True)
+    ).update(current_streak=0, data_version=F('data_version') + 1, updated_at=timezone.now())
+
+
+def record_quiz_attempt_score(attempt):
+    """Add a completed attempt to its quiz's running score aggregates and popularity"""
+    Quiz.objects.filter(pk=attempt.quiz_id).update(
+        completed_attempt_count=F('completed_attempt_count') + 1,
+        score_percentage_sum=F('score_percentage_sum') + attempt.score_percentage,
+        popularity_score=F('popularity_score') + popularity_weight(attempt.completed_at or timezone.now()),
+    )
+
+
+def refresh_quiz_counters(quizzes=None):
+    """
+    Recompute the denormalized Quiz counters from the question and attempt tables.
+
+    Runs as a single UPDATE with correlated subqueries. Returns the number of
+    quizzes updated.
+    """
+    if quizzes is None:
+        quizzes = Quiz.objects.all()
+
+    questions = Question.objects.filter(quiz=OuterRef('pk')).order_by().values('quiz') \
+        .annotate(total=Count('id')).values('total')
+    attempts = QuizAttempt.objects.filter(quiz=OuterRef('pk')).order_by().values('quiz') \
+        .annotate(total=Count('id')).values('total')
+    completed = QuizAttempt.objects.filter(quiz=OuterRef('pk'), status='completed').order_by().values('quiz')
+
+    return quizzes.update(
+        question_count=Coalesce(Subquery(questions, output_field=IntegerField()), Value(0)),
+        attempt_count=Coalesce(Subquery(attempts, output_field=IntegerField()), Value(0)),
+        completed_attempt_count=Coalesce(
+            Subquery(completed.annotate(total=Count('id')).values('total'), output_field=IntegerField()), Value(0)
+        ),
+        score_percentage_sum=Coalesce(
+            Subquery(completed.annotate(total=Sum('score_percentage')).values('total'), output_field=FloatField()),
+            Value(0.0)
+        ),
+    )
+
+
+def rebuild_popularity_scores(quizzes=None):
+    """
+    Recompute Quiz.popularity_score from the completed attempts.
+
+    Streams (quiz, completed_at) pairs once and writes the sums with a bulk
+    update. Returns the number of quizzes updated.
+    """
+    if quizzes is None:
+        quizzes = Quiz.objects.all()
+
+    scores = dict.fromkeys(quizzes.values_list('pk', flat=True), 0.0)
+    completions = QuizAttempt.objects.filter(quiz__in=quizzes, status='completed', completed_at__isnull=False) \
+        .order_by().values_list('quiz_id', 'completed_at')
+    for quiz_id, completed_at in completions.iterator():
+        scores[quiz_id] += popularity_weight(completed_at)
+
+    Quiz.objects.bulk_update(
+        [Quiz(pk=quiz_id, popularity_score=score) for quiz_id, score in scores.items()],
+        ['popularity_score'], batch_size=1000
+    )
+    return len(scores)
+
+
+def record_subject_performance(attempt):
+    """
+    Add a completed attempt to the user's running stats for its category/subject.
+
+    A single F() UPDATE in the common case; the row is created on the user's
+    first attempt in that subject.
+    """
+    quiz = attempt.quiz
+    score = attempt.score_percentage
+    time_taken = attempt.time_taken or 0
+    lookup = {'user_id': attempt.user_id, 'category_id': quiz.category_id, 'subject_id': quiz.subject_id}
+    latest = {'last_attempt': attempt, 'last_score': score, 'last_attempt_at': attempt.completed_at}
+
+    def increment():
+        return SubjectPerformance.objects.filter(**lookup).update(
+            attempt_count=F('attempt_count') + 1,
+            score_sum=F('score_sum') + score,
+            highest_score=Greatest(F('highest_score'), Value(score)),
+            time_spent=F('time_spent') + time_taken,
+            **latest
+        )
+
+    if increment():
+        return
+    try:
+        with transaction.atomic():
+            SubjectPerformance.objects.create(
+                attempt_count=1, score_sum=score, highest_score=score, time_spent=time_taken,
+                **lookup, **latest
+            )
+    except IntegrityError:
+        # A concurrent submit created the row first
+        increment()
+
+
+def record_xp_buckets(attempt, today=None):
+    """
+    Add a completed attempt's XP to the user's weekly, monthly and all-time
+    buckets, globally and for its category and subject.
+
+    All buckets are incremented with one F() UPDATE; the ones missing at the
+    start of a new period are created in bulk.
+    """
+    if not attempt.xp_earned:
+        return
+    if today is None:
+        today = timezone.now().date()
+    quiz = attempt.quiz
+    keys = [
+        (period, XPBucket.period_start_for(period, today), scope, scope_id)
+        for period in XPBucket.PERIODS
+        for scope, scope_id in (('global', 0), ('category', quiz.category_id), ('subject', quiz.subject_id))
+        # All-time global standings come from the profiles (see leaderboard.py)
+        if (period, scope) != ('all', 'global')
+    ]
+
+    def buckets(keys):
+        match = Q()
+        for period, period_start, scope, scope_id in keys:
+            match |= Q(period=period, period_start=period_start, scope=scope, scope_id=scope_id)
+        return XPBucket.objects.filter(match, user_id=attempt.user_id)
+
+    if buckets(keys).update(xp=F('xp') + attempt.xp_earned) == len(keys):
+        return
+    existing = set(buckets(keys).values_list('period', 'period_start', 'scope', 'scope_id'))
+    missing = [key for key in keys if key not in existing]
+    try:
+        with transaction.atomic():
+            XPBucket.objects.bulk_create([
+                XPBucket(user_id=attempt.user_id, period=period, period_start=period_start,
+                         scope=scope, scope_id=scope_id, xp=attempt.xp_earned)
+                for period, period_start, scope, scope_id in missing
+            ])
+    except IntegrityError:
+        # A concurrent submit created some of them first
+        for period, period_start, scope, scope_id in missing:
+            _, created = XPBucket.objects.get_or_create(
+                user_id=attempt.user_id, period=period, period_start=period_start,
+                scope=scope, scope_id=scope_id, defaults={'xp': attempt.xp_earned}
+            )
+            if not created:
+                buckets([(period, period_start, scope, scope_id)]).update(xp=F('xp') + attempt.xp_earned)
+
+
+def prune_xp_buckets(today=None):
+    """Delete week/month XP buckets of periods that have ended; returns how many"""
+    if today is None:
+        today = timezone.now().date()
+    expired = Q()
+    for period in ('week', 'month'):
+        expired |= Q(period=period, period_start__lt=XPBucket.period_start_for(period, today))
+    deleted, _ = XPBucket.objects.filter(expired).delete()
+    return deleted
+
+
+def rebuild_subject_performance(users=None):
+    """
+    Recompute SubjectPerformance rows from the completed attempt history.
+
+    Existing rows of the given users (all users by default) are replaced using
+    one grouped query. Returns the number of rows created.
+    """
+    completed = QuizAttempt.objects.filter(status='completed')
+    if users is not None:
+        completed = completed.filter(user__in=users)
+
+    latest = QuizAttempt.objects.filter(
+        user=OuterRef('user'),
+        quiz__category=OuterRef('quiz__category'),
+        quiz__subject=OuterRef('quiz__subject'),
+        status='completed',
+    ).order_by('-completed_at', '-id')
+
+    groups = completed.order_by().values('user', 'quiz__category', 'quiz__subject').annotate(
+        attempt_count=Count('id'),
+        score_sum=Sum('score_percentage'),
+        highest_score=Max('score_percentage'),
+        time_spent=Coalesce(Sum('time_taken'), Value(0)),
+        last_attempt_id=Subquery(latest.values('id')[:1]),
+        last_score=Subquery(latest.values('score_percentage')[:1]),
+        last_attempt_at=Max('completed_at'),
+    )
+
+    rows = [
+        SubjectPerformance(
+            user_id=group['user'],
+            category_id=group['quiz__category'],
+            subject_id=group['quiz__subject'],
+            attempt_count=group['attempt_count'],
+            score_sum=group['score_sum'] or 0.0,
+            highest_score=group['highest_score'] or 0.0,
+            time_spent=group['time_spent'],
+            last_attempt_id=group['last_attempt_id'],
+            last_score=group['last_score'] or 0.0,
+            last_attempt_at=group['last_attempt_at'],
+        )
+        for group in groups.iterator()
+    ]
+
+    with transaction.atomic():
+        existing = SubjectPerformance.objects.all()
+        if users is not None:
+            existing = existing.filter(user__in=users)
+        existing.delete()
+        SubjectPerformance.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
+
+
+def backfill_achievements(users=None, batch_size=1000):
+    """
+    Award achievements users already qualify for but never unlocked.
+
+    Event-only criteria (perfect_score, fast_quiz) come from two grouped
+    queries over the completed attempts; the counter criteria are read off
+    the profiles. Profiles are then processed in batches of `batch_size`:
+    each batch is locked, evaluated in memory against the catalog, and
+    written back with one bulk insert of UserAchievement rows and one bulk
+    update of XP, level and unlocked_achievement_ids. The unlocked ids are
+    rebuilt from the UserAchievement rows, so badges whose row was deleted
+    can be earned again.
+
+    Returns:
+        (achievements_awarded, users_updated)
+    """
+    catalog = get_achievement_catalog()
+    completed = QuizAttempt.objects.filter(status='completed').order_by()
+    profiles = UserProfile.objects.order_by('user_id')
+    if users is not None:
+        completed = completed.filter(user__in=users)
+        profiles = profiles.filter(user__in=users)
+
+    perfect_users = set()
+    if 'perfect_score' in catalog:
+        perfect_users = set(completed.filter(score_percentage=100).values_list('user_id', flat=True).distinct())
+    fastest = {}
+    if 'fast_quiz' in catalog:
+        fastest = dict(
+            completed.filter(total_questions__gte=5, time_taken__gt=0)
+            .values('user_id').annotate(fastest=Min('time_taken')).values_list('user_id', 'fastest')
+        )
+    counter_criteria = [
+        criteria_type for criteria_type in ('quizzes_taken', 'streak_days', 'quizzes_created', 'level_reached')
+        if criteria_type in catalog
+    ]
+
+    user_ids = list(profiles.values_list('user_id', flat=True))
+    awarded = updated = 0
+    for start in range(0, len(user_ids), batch_size):
+        batch = user_ids[start:start + batch_size]
+        with transaction.atomic():
+            existing = {}
+            for user_id, achievement_id in UserAchievement.objects.filter(user_id__in=batch) \
+                    .values_list('user_id', 'achievement_id'):
+                existing.setdefault(user_id, set()).add(achievement_id)
+
+            rows = []
+            changed = []
+            for profile in UserProfile.objects.select_for_update().filter(user_id__in=batch):
+                # The user's best completed attempt, as far as event criteria go
+                best_attempt = SimpleNamespace(
+                    score_percentage=100 if profile.user_id in perfect_users else 0,
+                    time_taken=fastest.get(profile.user_id),
+                    total_questions=5,
+                )
+                candidates = [
+                    achievement
+                    for criteria_type in counter_criteria
+                    for achievement in eligible_achievements(criteria_type, profile, {})
+                ]
+                candidates += eligible_achievements('perfect_score', profile, {'attempt': best_attempt})
+                candidates += eligible_achievements('fast_quiz', profile, {'attempt': best_attempt})
+
+                # The mirror is rebuilt from the UserAchievement rows, so ids of deleted rows drop out
+                unlocked = set(existing.get(profile.user_id, ()))
+                newly_unlocked = award_achievements(profile, unlocked, candidates)
+                rows.extend(
+                    UserAchievement(user_id=profile.user_id, achievement=achievement)
+                    for achievement in newly_unlocked
+                )
+                if newly_unlocked or sorted(unlocked) != sorted(profile.unlocked_achievement_ids):
+                    profile.unlocked_achievement_ids = sorted(unlocked)
+                    profile.data_version = F('data_version') + 1
+                    profile.updated_at = timezone.now()
+                    changed.append(profile)
+                    schedule_leaderboard_update(profile.user_id)
+
+            UserAchievement.objects.bulk_create(rows, batch_size=1000, ignore_conflicts=True)
+            UserProfile.objects.bulk_update(changed, [
+                'xp', 'level', 'xp_to_next_level', 'unlocked_achievement_ids', 'data_version', 'updated_at'
+            ], batch_size=1000)
+        awarded += len(rows)
+        updated += len(changed)
+    return awarded, updated
+
+
+def build_cooccurrence_neighbours(top_n=20, min_support=2, max_items_per_user=200, chunk_size=10000):
+    """
+    Rebuild the 'cooccurrence' QuizNeighbour rows from the completed attempts.
+
+    Distinct (user, quiz) pairs are streamed ordered by user, so only one
+    user's quizzes are held at a time; their pairwise co-occurrence counts
+    are accumulated into a sparse dict keyed by quiz pair. Similarity is the
+    cosine over the binary user x quiz matrix, c(a, b) / sqrt(n(a) * n(b)),
+    for pairs shared by at least `min_support` users. Users with more than
+    `max_items_per_user` quizzes only contribute their first ones, which
+    bounds the pair count per user.
+
+    Returns:
+        The number of neighbour rows stored.
+    """
+    pairs = QuizAttempt.objects.filter(status='completed', quiz__is_temporary=False) \
+        .order_by('user_id', 'quiz_id').values_list('user_id', 'quiz_id').distinct()
+
+    item_counts = {}
+    cooccurrence = {}
+    for _, rows in groupby(pairs.iterator(chunk_size=chunk_size), key=lambda row: row[0]):
+        quiz_ids = [quiz_id for _, quiz_id in rows][:max_items_per_user]
+        for quiz_id in quiz_ids:
+            item_counts[quiz_id] = item_counts.get(quiz_id, 0) + 1
+        # quiz_ids is sorted, so every pair comes out as (smaller, larger)
+        for pair in combinations(quiz_ids, 2):
+            cooccurrence[pair] = cooccurrence.get(pair, 0) + 1
+
+    neighbours = {}
+    for (a, b), count in cooccurrence.items():
+        if count < min_support:
+            continue
+        score = count / math.sqrt(item_counts[a] * item_counts[b])
+        for quiz_id, neighbour_id in ((a, b), (b, a)):
+            heap = neighbours.setdefault(quiz_id, [])
+            if len(heap) < top_n:
+                heapq.heappush(heap, (score, neighbour_id))
+            elif score > heap[0][0]:
+                heapq.heapreplace(heap, (score, neighbour_id))
+
+    rows = [
+        QuizNeighbour(quiz_id=quiz_id, neighbour_id=neighbour_id, kind='cooccurrence', score=score)
+        for quiz_id, heap in neighbours.items()
+        for score, neighbour_id in heap
+    ]
+    with transaction.atomic():
+        QuizNeighbour.objects.filter(kind='cooccurrence').delete()
+        QuizNeighbour.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
+
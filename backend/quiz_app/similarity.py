@@ -0,0 +1,172 @@
+"""
+Content similarity between quizzes.
+
+Each quiz's question text (questions and options) is turned into a TF-IDF
+vector, L2-normalized and truncated to its MAX_TERMS heaviest terms, stored
+as QuizTerm rows (an inverted index on term). Cosine similarities are
+computed through the shared terms only and each quiz's top neighbours are
+stored as 'content' QuizNeighbour rows, so /quizzes/<id>/similar/ is a
+single indexed read.
+
+Document frequencies are kept in TermFrequency. `manage.py
+build_similar_quizzes` rebuilds everything; quizzes generated in between are
+counted into TermFrequency and indexed on creation against the stored term
+weights (index_quiz_content).
+"""
+import heapq
+import math
+import re
+from itertools import groupby
+
+from django.db import transaction
+from django.db.models import F
+
+from .models import Question, Quiz, QuizNeighbour, QuizTerm, TermFrequency
+
+MAX_TERMS = 50
+NEIGHBOURS = 10
+# Terms found in more than this share of quizzes carry no signal and are skipped,
+# once there are enough quizzes to tell common words from a shared topic
+MAX_DOCUMENT_RATIO = 0.5
+MIN_RATIO_DOCUMENTS = 20
+
+TOKEN_RE = re.compile(r'[a-z0-9]+')
+STOPWORDS = frozenset("""
+    about above after again all also and any are because been before being below between both but
+    can could did does doing down during each few for from further had has have having her here hers
+    him his how into its itself just more most not now off once only other our out over own same she
+    should some such than that the their them then there these they this those through too under until
+    very was were what when where which while who whom why will with would you your yours following
+    true false none correct answer question
+""".split())
+
+
+def tokenize(text):
+    return [token for token in TOKEN_RE.findall(text.lower()) if 2 < len(token) <= 50 and token not in STOPWORDS]
+
+
+def question_terms(questions):
+    """Term counts of (question_text, options) pairs"""
+    counts = {}
+    for question_text, options in questions:
+        text = ' '.join([question_text or ''] + [str(option) for option in options or []])
+        for token in tokenize(text):
+            counts[token] = counts.get(token, 0) + 1
+    return counts
+
+
+def too_common(df, documents):
+    return documents >= MIN_RATIO_DOCUMENTS and df > MAX_DOCUMENT_RATIO * documents
+
+
+def tfidf_vector(term_counts, document_frequency, documents):
+    """Normalized TF-IDF weights of the MAX_TERMS heaviest informative terms"""
+    weights = {}
+    for term, count in term_counts.items():
+        df = document_frequency.get(term, 0)
+        if too_common(df, documents):
+            continue
+        weights[term] = (1 + math.log(count)) * (math.log((1 + documents) / (1 + df)) + 1)
+    top = heapq.nlargest(MAX_TERMS, weights.items(), key=lambda item: item[1])
+    norm = math.sqrt(sum(weight * weight for _, weight in top)) or 1.0
+    return {term: weight / norm for term, weight in top}
+
+
+def _indexed_quizzes():
+    return Quiz.objects.filter(is_temporary=False)
+
+
+def build_content_neighbours(top_n=NEIGHBOURS):
+    """
+    Rebuild every quiz's QuizTerm vector and 'content' neighbours.
+
+    Question texts are streamed ordered by quiz. Returns (quizzes indexed,
+    neighbour rows stored).
+    """
+    questions = Question.objects.filter(quiz__in=_indexed_quizzes()) \
+        .order_by('quiz_id').values_list('quiz_id', 'question_text', 'options')
+    term_counts = {
+        quiz_id: question_terms((text, options) for _, text, options in rows)
+        for quiz_id, rows in groupby(questions.iterator(), key=lambda row: row[0])
+    }
+
+    document_frequency = {}
+    for counts in term_counts.values():
+        for term in counts:
+            document_frequency[term] = document_frequency.get(term, 0) + 1
+    vectors = {
+        quiz_id: tfidf_vector(counts, document_frequency, len(term_counts))
+        for quiz_id, counts in term_counts.items()
+    }
+
+    postings = {}
+    for quiz_id, vector in vectors.items():
+        for term, weight in vector.items():
+            postings.setdefault(term, []).append((quiz_id, weight))
+
+    neighbour_rows = []
+    for quiz_id, vector in vectors.items():
+        scores = {}
+        for term, weight in vector.items():
+            for other_id, other_weight in postings[term]:
+                if other_id != quiz_id:
+                    scores[other_id] = scores.get(other_id, 0.0) + weight * other_weight
+        neighbour_rows.extend(
+            QuizNeighbour(quiz_id=quiz_id, neighbour_id=other_id, kind='content', score=score)
+            for other_id, score in heapq.nlargest(top_n, scores.items(), key=lambda item: item[1])
+        )
+
+    with transaction.atomic():
+        TermFrequency.objects.all().delete()
+        TermFrequency.objects.bulk_create([
+            TermFrequency(term=term, document_count=count) for term, count in document_frequency.items()
+        ], batch_size=1000)
+        QuizTerm.objects.all().delete()
+        QuizTerm.objects.bulk_create([
+            QuizTerm(quiz_id=quiz_id, term=term, weight=weight)
+            for quiz_id, vector in vectors.items()
+            for term, weight in vector.items()
+        ], batch_size=1000)
+        QuizNeighbour.objects.filter(kind='content').delete()
+        QuizNeighbour.objects.bulk_create(neighbour_rows, batch_size=1000)
+    return len(vectors), len(neighbour_rows)
+
+
+def index_quiz_content(quiz, top_n=NEIGHBOURS):
+    """
+    Index a newly generated quiz and link it with its most similar quizzes.
+
+    The quiz's terms are counted into TermFrequency first, so its weights
+    use the same document frequencies a full rebuild would. They are
+    compared against the stored vectors of the other quizzes, which keep
+    their weights until the next full rebuild. The new quiz is also added to
+    its neighbours' lists (trimmed on the next rebuild).
+    """
+    counts = question_terms(quiz.questions.values_list('question_text', 'options'))
+    if not counts:
+        return
+    with transaction.atomic():
+        TermFrequency.objects.bulk_create([TermFrequency(term=term) for term in counts], ignore_conflicts=True)
+        TermFrequency.objects.filter(term__in=counts).update(document_count=F('document_count') + 1)
+    document_frequency = dict(TermFrequency.objects.filter(term__in=counts).values_list('term', 'document_count'))
+    documents = _indexed_quizzes().count()
+    vector = tfidf_vector(counts, document_frequency, documents)
+
+    scores = {}
+    for other_id, term, other_weight in QuizTerm.objects.filter(term__in=vector).exclude(quiz=quiz) \
+            .values_list('quiz_id', 'term', 'weight'):
+        scores[other_id] = scores.get(other_id, 0.0) + vector[term] * other_weight
+    neighbours = heapq.nlargest(top_n, scores.items(), key=lambda item: item[1])
+
+    with transaction.atomic():
+        QuizTerm.objects.filter(quiz=quiz).delete()
+        QuizTerm.objects.bulk_create([QuizTerm(quiz=quiz, term=term, weight=weight) for term, weight in vector.items()])
+        QuizNeighbour.objects.filter(kind='content', quiz=quiz).delete()
+        QuizNeighbour.objects.bulk_create([
+            row
+            for other_id, score in neighbours
+            for row in (
+                QuizNeighbour(quiz=quiz, neighbour_id=other_id, kind='content', score=score),
+                QuizNeighbour(quiz_id=other_id, neighbour=quiz, kind='content', score=score),
+            )
+        ], ignore_conflicts=True)
@@ -10,19 +10,19 @@ from .views import (
     # Quiz Configuration
     QuizConfigView,
     # Quiz Generation
-    QuizGenerateView, QuizGenerateFromFileView,
+    QuizGenerateView, QuizGenerateFromFileView, QuizBatchGenerateFromFilesView,
     # Quiz Management
-    RecommendedQuizzes, QuizListView, QuizDetailView, QuizTakeView,
+    RecommendedQuizzes, QuizListView, QuizDetailView, QuizTakeView, SimilarQuizzesView,
     # Quiz Attempts
     QuizStartView, QuizSubmitView, QuizAttemptDetailView, UserQuizHistoryView,
     # Analytics
-    UserAnalyticsView, RecentActivityView, UserPerformanceView,
+    UserAnalyticsView, RecentActivityView, UserPerformanceView, UserDashboardView,
     # Performance Dashboard
     OverallPerformanceMetricsView, CategoryDistributionView, PerformanceByCategoryView, PerformanceBySubjectView, UserProgressView,
     # Achievements
-    AchievementListView, UserAchievementsView,
+    AchievementListView, UserAchievementsView, UserAchievementProgressView,
     # Leaderboard
-    LeaderboardView,
+    LeaderboardView, LeaderboardRankView,
     QuizMetadataView,
     # Account
     DeleteAccountView,
@@ -53,12 +53,14 @@ urlpatterns = [
     # Quiz generation endpoints
     path('quiz/generate/', QuizGenerateView.as_view(), name='quiz-generate'),
     path('quiz/generate/file/', QuizGenerateFromFileView.as_view(), name='quiz-generate-file'),
+    path('quiz/generate/batch/', QuizBatchGenerateFromFilesView.as_view(), name='quiz-generate-batch'),
     
     # Quiz management endpoints
     path('quizzes/recommended/', RecommendedQuizzes.as_view(), name='quiz-recommended'),
     path('quizzes/', QuizListView.as_view(), name='quiz-list'),
     path('quizzes/<int:quiz_id>/', QuizDetailView.as_view(), name='quiz-detail'),
     path('quizzes/<int:quiz_id>/take/', QuizTakeView.as_view(), name='quiz-take'),
+    path('quizzes/<int:quiz_id>/similar/', SimilarQuizzesView.as_view(), name='quiz-similar'),
     
     # Quiz attempt endpoints
     path('quiz/start/', QuizStartView.as_view(), name='quiz-start'),
@@ -70,6 +72,7 @@ urlpatterns = [
     path('user/analytics/', UserAnalyticsView.as_view(), name='user-analytics'),
     path('user/activity/', RecentActivityView.as_view(), name='recent-activity'),
     path('user/performance/', UserPerformanceView.as_view(), name='user-performance'),
+    path('user/dashboard/', UserDashboardView.as_view(), name='user-dashboard'),
 
     # Performance Dashboard endpoints
     path('user/performance/overall/', OverallPerformanceMetricsView.as_view(), name='performance-overall'),
@@ -82,7 +85,9 @@ urlpatterns = [
     # Achievement endpoints
     path('achievements/', AchievementListView.as_view(), name='achievement-list'),
     path('user/achievements/', UserAchievementsView.as_view(), name='user-achievements'),
+    path('user/achievements/progress/', UserAchievementProgressView.as_view(), name='user-achievement-progress'),
     
     # Leaderboard endpoint
     path('leaderboard/', LeaderboardView.as_view(), name='leaderboard'),
+    path('leaderboard/me/', LeaderboardRankView.as_view(), name='leaderboard-rank'),
 ]
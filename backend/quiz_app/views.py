@@ -1,12 +1,21 @@
 import random
 import json
 import io
+import os
+import re
 import traceback
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
+from itertools import groupby
 from django.utils import timezone
+from django.utils.dateparse import parse_date
 from django.conf import settings
 from django.contrib.auth.models import User
-from django.db.models import Q, Count, Avg, Max
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.db.models import F, Q, Count, Prefetch
+from django.http import StreamingHttpResponse
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status, generics, viewsets
@@ -15,13 +24,15 @@ from rest_framework.authtoken.models import Token
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.decorators import api_view, permission_classes, action
 from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
+from rest_framework.utils.encoders import JSONEncoder
 from openai import OpenAI
 from groq import Groq
 import requests
 
 from .models import (
-    Category, Level, Subject, QuizConfig, Quiz, Question,
-    QuizAttempt, Answer, UserProfile, Achievement, UserAchievement, QuizAnalytics
+    Category, Level, Subject, QuizConfig, Quiz,
+    QuizAttempt, Answer, UserProfile, Achievement, UserAchievement, QuizAnalytics,
+    SubjectPerformance, XPBucket, QuizNeighbour, popularity_weight
 )
 # from .hardcoded_questions import HARDCODED_QUESTIONS  <-- Removed import
 from .serializers import (
@@ -31,6 +42,14 @@ from .serializers import (
     QuizSubmitSerializer, AchievementSerializer, UserAchievementSerializer,
     QuizAnalyticsSerializer, RecentActivitySerializer, QuizResultSerializer
 )
+from .pagination import KeysetPagination
+from .leaderboard import leaderboard, scoped_leaderboard
+from .similarity import NEIGHBOURS as SIMILAR_QUIZ_NEIGHBOURS
+from .response_cache import cache_user_response, get_user_cached
+from .services import (
+    achievement_catalog_version, achievement_progress, bump_data_version, create_quiz_with_questions, get_activity_calendar, grade_attempt, record_attempt_started, record_attempt_stats,
+    record_profile_score, record_quiz_attempt_score, record_subject_performance, record_xp_buckets
+)
 
 # Configure OpenAI client lazily to avoid initialization errors
 _openai_client = None
@@ -202,8 +221,12 @@ def generate_ai_response(prompt, max_tokens=2000):
         raise ValueError(f"Failed to get response from any AI service: {e}")
 
 
-def extract_text_from_file(file):
-    """Extract text content from uploaded files (PDF, DOCX, TXT)"""
+def extract_text_from_file(file, max_chars=5000):
+    """Extract text content from uploaded files (PDF, DOCX, TXT)
+
+    The result is truncated to ``max_chars`` characters; pass ``None`` to keep
+    the full text (the batch upload ranks chunks itself).
+    """
     filename = file.name.lower()
     content = ""
     
@@ -251,7 +274,7 @@ def extract_text_from_file(file):
         file.seek(0)
         
         # Limit content length for API
-        final_content = content[:5000] if content else ""
+        final_content = content[:max_chars] if content else ""
         print(f"DEBUG: Final content length: {len(final_content)}")
         return final_content
     
@@ -263,6 +286,204 @@ def extract_text_from_file(file):
         traceback.print_exc()
         raise ValueError(f"Error reading file: {str(e)}")
 
+
+ALLOWED_UPLOAD_EXTENSIONS = ['.pdf', '.docx', '.txt', '.doc']
+MAX_UPLOAD_SIZE = 50 * 1024 * 1024
+
+# Batch upload limits
+BATCH_MAX_FILES = 20
+BATCH_MAX_TOTAL_SIZE = 200 * 1024 * 1024
+BATCH_MAX_WORKERS = 4
+BATCH_CHUNK_SIZE = 1000
+BATCH_COMBINED_MAX_CHARS = 12000
+
+DIFFICULTY_INSTRUCTIONS = {
+    'easy': "Focus on basic facts, definitions, and simple recall. Questions should be direct and encouraging.",
+    'medium': "Focus on understanding and application. clearly test if the user grasps the core concepts. Mix straightforward questions with some that require thought.",
+    'hard': "GENERATE SUPER SMART QUESTIONS. Focus on deep analysis, critical thinking, and synthesis of multiple concepts. Avoid simple recall. Ask 'Why', 'How', and 'What if' questions. Test the user's ability to apply knowledge in complex or novel scenarios. Make distractors (wrong options) plausible and tricky."
+}
+
+
+def get_file_extension(filename):
+    """Return the lower-cased extension of a filename including the dot, or ''"""
+    return '.' + filename.split('.')[-1].lower() if '.' in filename else ''
+
+
+def parse_ai_questions(ai_content):
+    """Extract the JSON question array from a raw LLM response"""
+    # Try to extract JSON if wrapped in markdown
+    if '```json' in ai_content:
+        ai_content = ai_content.split('```json')[1]
+        ai_content = ai_content.split('```')[0]
+    elif ai_content.startswith('```'):
+        ai_content = ai_content.split('```')[1]
+
+    # Find the start and end of the JSON array
+    start_index = ai_content.find('[')
+    end_index = ai_content.rfind(']')
+
+    if start_index != -1 and end_index != -1:
+        ai_content = ai_content[start_index:end_index+1]
+
+    return json.loads(ai_content)
+
+
+def generate_questions_from_material(material, num_questions, difficulty, max_tokens=2000):
+    """Ask the LLM for multiple-choice questions based on study material"""
+    instruction = DIFFICULTY_INSTRUCTIONS.get(difficulty, DIFFICULTY_INSTRUCTIONS['medium'])
+
+    prompt = f"""Based on the following study material, generate {num_questions} multiple-choice questions.
+
+        Difficulty Level: {difficulty.upper()}
+        Specific Instructions: {instruction}
+
+        Study Material:
+        {material}
+
+        Return ONLY a valid JSON array with this structure:
+        [
+            {{
+                "question": "Question text?",
+                "options": ["Option 1", "Option 2", "Option 3", "Option 4"],
+                "correct_answer": 0,
+                "explanation": "Explanation"
+            }}
+        ]
+        """
+
+    ai_content = generate_ai_response(prompt, max_tokens=max_tokens)
+    print(f"DEBUG: Raw AI response content (first 500 chars): {ai_content[:500]}...")
+    return parse_ai_questions(ai_content)
+
+
+def expand_batch_uploads(uploads):
+    """
+    Flatten a list of uploaded files into individual documents.
+
+    ZIP archives are opened and each supported member becomes its own document.
+    Returns a tuple of (documents, skipped) where skipped is a list of
+    {'file': name, 'error': reason} entries for members that were ignored.
+    """
+    documents = []
+    skipped = []
+    total_size = 0
+
+    for upload in uploads:
+        ext = get_file_extension(upload.name)
+
+        if ext == '.zip':
+            try:
+                archive = zipfile.ZipFile(upload)
+            except zipfile.BadZipFile:
+                skipped.append({'file': upload.name, 'error': 'Invalid ZIP archive'})
+                continue
+
+            with archive:
+                for info in archive.infolist():
+                    name = os.path.basename(info.filename)
+                    if info.is_dir() or not name or name.startswith('.') or info.filename.startswith('__MACOSX/'):
+                        continue
+                    if get_file_extension(name) not in ALLOWED_UPLOAD_EXTENSIONS:
+                        skipped.append({'file': name, 'error': 'Unsupported file type'})
+                        continue
+                    if info.file_size > MAX_UPLOAD_SIZE:
+                        skipped.append({'file': name, 'error': 'File size must be less than 50MB'})
+                        continue
+
+                    # Guard against archives that expand to an excessive size
+                    total_size += info.file_size
+                    if total_size > BATCH_MAX_TOTAL_SIZE:
+                        raise ValueError('Uncompressed upload exceeds the 200MB batch limit')
+
+                    documents.append(ContentFile(archive.read(info), name=name))
+            continue
+
+        if ext not in ALLOWED_UPLOAD_EXTENSIONS:
+            skipped.append({'file': upload.name, 'error': 'Unsupported file type'})
+            continue
+        if upload.size > MAX_UPLOAD_SIZE:
+            skipped.append({'file': upload.name, 'error': 'File size must be less than 50MB'})
+            continue
+
+        total_size += upload.size
+        if total_size > BATCH_MAX_TOTAL_SIZE:
+            raise ValueError('Upload exceeds the 200MB batch limit')
+        documents.append(upload)
+
+    if len(documents) > BATCH_MAX_FILES:
+        raise ValueError(f'A batch may contain at most {BATCH_MAX_FILES} files')
+
+    return documents, skipped
+
+
+def split_into_chunks(text, chunk_size=BATCH_CHUNK_SIZE):
+    """Split text into roughly chunk_size pieces on paragraph boundaries"""
+    chunks = []
+    current = ""
+    for paragraph in re.split(r'\n\s*\n', text):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        # Hard-wrap paragraphs that are longer than a chunk on their own
+        while len(paragraph) > chunk_size:
+            if current:
+                chunks.append(current)
+                current = ""
+            chunks.append(paragraph[:chunk_size])
+            paragraph = paragraph[chunk_size:]
+        if current and len(current) + len(paragraph) + 2 > chunk_size:
+            chunks.append(current)
+            current = ""
+        current = f"{current}\n\n{paragraph}" if current else paragraph
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _chunk_score(chunk):
+    """Information density of a chunk: number of distinct content words"""
+    return len({word.lower() for word in re.findall(r'[A-Za-z]{4,}', chunk)})
+
+
+def merge_ranked_chunks(documents, max_chars=BATCH_COMBINED_MAX_CHARS):
+    """
+    Combine the text of several documents into a single study material.
+
+    Each document is split into chunks which are ranked by information density.
+    Chunks are then taken round-robin across documents (best first) so that every
+    document is represented, until max_chars is reached. The selected chunks are
+    emitted in their original reading order, grouped by source.
+
+    Args:
+        documents: list of (name, text) tuples
+    """
+    ranked = []
+    for doc_index, (name, text) in enumerate(documents):
+        chunks = split_into_chunks(text)
+        order = sorted(range(len(chunks)), key=lambda i: _chunk_score(chunks[i]), reverse=True)
+        ranked.append([(doc_index, i, chunks[i]) for i in order])
+
+    selected = []
+    budget = max_chars
+    while budget > 0 and any(ranked):
+        for queue in ranked:
+            if not queue:
+                continue
+            doc_index, position, chunk = queue.pop(0)
+            if len(chunk) > budget:
+                # Skip chunks that no longer fit; smaller ones may still do
+                continue
+            selected.append((doc_index, position, chunk))
+            budget -= len(chunk)
+
+    selected.sort()
+    sections = []
+    for doc_index, group in groupby(selected, key=lambda item: item[0]):
+        body = "\n\n".join(chunk for _, _, chunk in group)
+        sections.append(f"Source: {documents[doc_index][0]}\n{body}")
+    return "\n\n".join(sections)
+
+
 # ==================== AUTHENTICATION VIEWS ====================
 
 class RegisterView(APIView):
@@ -293,9 +514,7 @@ class LoginView(ObtainAuthToken):
         user = serializer.validated_data['user']
         token, created = Token.objects.get_or_create(user=user)
         
-        # Update user profile activity
         profile = user.profile
-        profile.check_streak()
         
         return Response({
             'token': token.key,
@@ -511,10 +730,10 @@ class UserProfileView(APIView):
     permission_classes = [IsAuthenticated]
     parser_classes = [MultiPartParser, FormParser, JSONParser]
 
+    @cache_user_response
     def get(self, request):
         try:
             profile = request.user.profile
-            profile.check_streak()
             serializer = UserProfileSerializer(profile)
             return Response(serializer.data)
         except UserProfile.DoesNotExist:
@@ -528,6 +747,7 @@ class UserProfileView(APIView):
         serializer = UserProfileSerializer(profile, data=request.data, partial=True)
         if serializer.is_valid():
             serializer.save()
+            bump_data_version(request.user)
             return Response(serializer.data)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -1015,20 +1235,7 @@ class QuizGenerateView(APIView):
             max_tokens = min(num_questions * max_tokens_per_question, 8000)
 
             ai_content = generate_ai_response(prompt, max_tokens=max_tokens)
-            
-            # Clean up the response
-            if '```json' in ai_content:
-                ai_content = ai_content.split('```json')[1].split('```')[0]
-            elif ai_content.startswith('```'):
-                ai_content = ai_content.split('```')[1]
-            
-            start_index = ai_content.find('[')
-            end_index = ai_content.rfind(']')
-
-            if start_index != -1 and end_index != -1:
-                ai_content = ai_content[start_index:end_index+1]
-            
-            all_questions_data = json.loads(ai_content)
+            all_questions_data = parse_ai_questions(ai_content)
 
         except Exception as e:
             last_error = e
@@ -1045,9 +1252,10 @@ class QuizGenerateView(APIView):
         
         random.shuffle(all_questions_data)
 
-        # Create Quiz
+        # Create Quiz and its questions in one transaction
         quiz_title = custom_title or f"{subject.name} - {difficulty.capitalize()} Quiz"
-        quiz = Quiz.objects.create(
+        quiz = create_quiz_with_questions(
+            request.user, all_questions_data,
             title=quiz_title,
             category=category,
             level=level,
@@ -1056,26 +1264,8 @@ class QuizGenerateView(APIView):
             quiz_type='ai_generated',
             is_ai_generated=True,
             is_published=True,
-            created_by=request.user,
             time_limit=num_questions * 60  # 60 seconds per question
         )
-
-        
-        # Create Questions
-        for idx, q_data in enumerate(all_questions_data):
-            Question.objects.create(
-                quiz=quiz,
-                question_text=q_data['question'],
-                options=q_data['options'],
-                correct_answer=q_data['correct_answer'],
-                explanation=q_data.get('explanation', ''),
-                order=idx + 1
-            )
-        
-        # Update user profile
-        profile = request.user.profile
-        profile.total_quizzes_created += 1
-        profile.save()
         
         serializer = QuizSerializer(quiz)
         return Response({
@@ -1131,13 +1321,12 @@ class QuizGenerateFromFileView(APIView):
             return Response({'error': f'Subject with ID {subject_id} not found'}, status=status.HTTP_404_NOT_FOUND)
         
         # Validate file size (max 50MB)
-        if file.size > 50 * 1024 * 1024:
+        if file.size > MAX_UPLOAD_SIZE:
             return Response({'error': 'File size must be less than 50MB'}, status=status.HTTP_400_BAD_REQUEST)
         
         # Validate file type
-        allowed_extensions = ['.pdf', '.docx', '.txt', '.doc']
-        file_ext = '.' + file.name.split('.')[-1].lower() if '.' in file.name else ''
-        if file_ext not in allowed_extensions:
+        file_ext = get_file_extension(file.name)
+        if file_ext not in ALLOWED_UPLOAD_EXTENSIONS:
             return Response({
                 'error': f'Invalid file type. Allowed types: PDF, DOCX, TXT'
             }, status=status.HTTP_400_BAD_REQUEST)
@@ -1162,86 +1351,23 @@ class QuizGenerateFromFileView(APIView):
         print(f"DEBUG: Preparing OpenAI prompt with {len(file_content)} characters of file content.")
         print(f"DEBUG: File content (first 500 chars): {file_content[:500]}...")
         
-        # Define smart instructions based on difficulty
-        difficulty_instructions = {
-            'easy': "Focus on basic facts, definitions, and simple recall. Questions should be direct and encouraging.",
-            'medium': "Focus on understanding and application. clearly test if the user grasps the core concepts. Mix straightforward questions with some that require thought.",
-            'hard': "GENERATE SUPER SMART QUESTIONS. Focus on deep analysis, critical thinking, and synthesis of multiple concepts. Avoid simple recall. Ask 'Why', 'How', and 'What if' questions. Test the user's ability to apply knowledge in complex or novel scenarios. Make distractors (wrong options) plausible and tricky."
-        }
-        instruction = difficulty_instructions.get(difficulty, difficulty_instructions['medium'])
-
-        prompt = f"""Based on the following study material, generate {num_questions} multiple-choice questions.
-        
-        Difficulty Level: {difficulty.upper()}
-        Specific Instructions: {instruction}
-        
-        Study Material:
-        {file_content}
-        
-        Return ONLY a valid JSON array with this structure:
-        [
-            {{
-                "question": "Question text?",
-                "options": ["Option 1", "Option 2", "Option 3", "Option 4"],
-                "correct_answer": 0,
-                "explanation": "Explanation"
-            }}
-        ]
-        """
-        
         try:
-            ai_content = generate_ai_response(prompt)
-            print(f"DEBUG: Raw AI response content (first 500 chars): {ai_content[:500]}...")
-
-            # Try to extract JSON if wrapped in markdown
-            if '```json' in ai_content:
-                ai_content = ai_content.split('```json')[1]
-                ai_content = ai_content.split('```')[0]
-            elif ai_content.startswith('```'):
-                ai_content = ai_content.split('```')[1]
-
-            # Find the start and end of the JSON array
-            start_index = ai_content.find('[')
-            end_index = ai_content.rfind(']')
-
-            if start_index != -1 and end_index != -1:
-                ai_content = ai_content[start_index:end_index+1]
-            
-            print(f"DEBUG: AI response content after extraction attempts (first 500 chars): {ai_content[:500]}...")
-
-            questions_data = json.loads(ai_content)
+            questions_data = generate_questions_from_material(file_content, num_questions, difficulty)
             
-            # Create Quiz with foreign key assignments
-            quiz = Quiz(
+            quiz = create_quiz_with_questions(
+                request.user, questions_data,
                 title=title,
+                category=category,
+                level=level,
+                subject=subject,
                 difficulty=difficulty,
                 quiz_type='file_upload',
                 is_ai_generated=True,
                 is_published=True,  # Explicitly set to ensure quiz is accessible
                 is_temporary=False, # Allow stats for file-generated quizzes
-                created_by=request.user,
                 uploaded_file=file,
                 time_limit=num_questions * 60  # 1 minute per question
             )
-            # Assign foreign keys using validated objects
-            quiz.category = category
-            quiz.level = level
-            quiz.subject = subject
-            quiz.save()
-            
-            for idx, q_data in enumerate(questions_data):
-                Question.objects.create(
-                    quiz=quiz,
-                    question_text=q_data['question'],
-                    options=q_data['options'],
-                    correct_answer=q_data['correct_answer'],
-                    explanation=q_data.get('explanation', ''),
-                    order=idx + 1
-                )
-            
-            profile = request.user.profile
-            profile.total_quizzes_created += 1
-            profile.save()
             
             serializer = QuizSerializer(quiz)
             return Response({
@@ -1278,15 +1404,230 @@ class QuizGenerateFromFileView(APIView):
                 'type': type(e).__name__
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+class QuizBatchGenerateFromFilesView(APIView):
+    """
+    Generate quizzes from several uploaded files or a ZIP archive.
+
+    Form fields:
+        files: one or more PDF/DOCX/TXT files and/or ZIP archives
+        mode: 'combined' (one quiz from all documents, default) or 'per_file'
+        title, num_questions, difficulty, category_id, level_id, subject_id:
+            same as the single-file endpoint
+
+    Documents are extracted in parallel and the response is streamed as
+    newline-delimited JSON, one event per line, as each item finishes.
+    """
+    permission_classes = [IsAuthenticated]
+    parser_classes = [MultiPartParser, FormParser]
+
+    def post(self, request):
+        uploads = request.FILES.getlist('files')
+        mode = request.data.get('mode', 'combined')
+        title = request.data.get('title', '')
+        num_questions = int(request.data.get('num_questions', 10))
+        if num_questions > 100:
+            num_questions = 100
+        difficulty = request.data.get('difficulty', 'medium')
+        category_id = request.data.get('category_id')
+        level_id = request.data.get('level_id')
+        subject_id = request.data.get('subject_id')
+
+        if not uploads:
+            return Response({'error': 'At least one file is required'}, status=status.HTTP_400_BAD_REQUEST)
+        if mode not in ('combined', 'per_file'):
+            return Response({'error': "mode must be 'combined' or 'per_file'"}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Validate required metadata fields
+        if not category_id:
+            return Response({'error': 'Category is required'}, status=status.HTTP_400_BAD_REQUEST)
+        if not level_id:
+            return Response({'error': 'Level is required'}, status=status.HTTP_400_BAD_REQUEST)
+        if not subject_id:
+            return Response({'error': 'Subject is required'}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            category = Category.objects.get(pk=category_id)
+        except Category.DoesNotExist:
+            return Response({'error': f'Category with ID {category_id} not found'}, status=status.HTTP_404_NOT_FOUND)
+
+        try:
+            level = Level.objects.get(pk=level_id)
+        except Level.DoesNotExist:
+            return Response({'error': f'Level with ID {level_id} not found'}, status=status.HTTP_404_NOT_FOUND)
+
+        try:
+            subject = Subject.objects.get(pk=subject_id)
+        except Subject.DoesNotExist:
+            return Response({'error': f'Subject with ID {subject_id} not found'}, status=status.HTTP_404_NOT_FOUND)
+
+        try:
+            documents, skipped = expand_batch_uploads(uploads)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        if not documents:
+            return Response({
+                'error': 'No supported files found. Allowed types: PDF, DOCX, TXT',
+                'skipped': skipped
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        options = {
+            'user': request.user,
+            'title': title,
+            'num_questions': num_questions,
+            'difficulty': difficulty,
+            'category': category,
+            'level': level,
+            'subject': subject,
+        }
+        if mode == 'per_file':
+            events = self._stream_per_file(documents, skipped, options)
+        else:
+            events = self._stream_combined(documents, skipped, options)
+
+        response = StreamingHttpResponse(
+            (json.dumps(event, cls=JSONEncoder) + "\n" for event in events),
+            content_type='application/x-ndjson'
+        )
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+    @staticmethod
+    def _extract(document):
+        content = extract_text_from_file(document, max_chars=None)
+        if not content or len(content.strip()) < 50:
+            raise ValueError('Could not extract enough text from the file.')
+        return content
+
+    @classmethod
+    def _extract_and_generate(cls, document, num_questions, difficulty):
+        content = cls._extract(document)
+        return generate_questions_from_material(content[:5000], num_questions, difficulty)
+
+    @staticmethod
+    def _create_quiz(options, title, questions_data, uploaded_file=None):
+        return create_quiz_with_questions(
+            options['user'], questions_data,
+            title=title,
+            category=options['category'],
+            level=options['level'],
+            subject=options['subject'],
+            difficulty=options['difficulty'],
+            quiz_type='file_upload',
+            is_ai_generated=True,
+            is_published=True,
+            is_temporary=False,
+            uploaded_file=uploaded_file,
+            time_limit=options['num_questions'] * 60
+        )
+
+    @staticmethod
+    def _quiz_event(quiz, sources):
+        return {
+            'type': 'quiz',
+            'files': sources,
+            'quiz_id': quiz.id,
+            'title': quiz.title,
+            'questions_count': quiz.questions.count(),
+            'difficulty': quiz.difficulty,
+            'quiz': QuizSerializer(quiz).data,
+        }
+
+    def _stream_per_file(self, documents, skipped, options):
+        for item in skipped:
+            yield {'type': 'error', **item}
+
+        created = 0
+        pool = ThreadPoolExecutor(max_workers=min(BATCH_MAX_WORKERS, len(documents)))
+        try:
+            futures = {
+                pool.submit(self._extract_and_generate, document, options['num_questions'], options['difficulty']): document
+                for document in documents
+            }
+            # Database writes stay on the request thread; workers only extract and call the LLM
+            for future in as_completed(futures):
+                document = futures[future]
+                try:
+                    questions_data = future.result()
+                    stem = os.path.splitext(document.name)[0]
+                    quiz_title = f"{options['title']} - {stem}" if options['title'] else stem
+                    quiz = self._create_quiz(options, quiz_title, questions_data, uploaded_file=document)
+                except Exception as e:
+                    traceback.print_exc()
+                    yield {'type': 'error', 'file': document.name, 'error': str(e)}
+                    continue
+                created += 1
+                yield self._quiz_event(quiz, [document.name])
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+        yield {'type': 'done', 'quizzes_created': created}
+
+    def _stream_combined(self, documents, skipped, options):
+        for item in skipped:
+            yield {'type': 'error', **item}
+
+        extracted = []
+        pool = ThreadPoolExecutor(max_workers=min(BATCH_MAX_WORKERS, len(documents)))
+        try:
+            futures = {pool.submit(self._extract, document): document for document in documents}
+            for future in as_completed(futures):
+                document = futures[future]
+                try:
+                    content = future.result()
+                except Exception as e:
+                    yield {'type': 'error', 'file': document.name, 'error': str(e)}
+                    continue
+                extracted.append((document.name, content))
+                yield {'type': 'extracted', 'file': document.name, 'characters': len(content)}
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+        if not extracted:
+            yield {'type': 'done', 'quizzes_created': 0}
+            return
+
+        # Keep the upload order stable regardless of which extraction finished first
+        upload_order = {document.name: idx for idx, document in enumerate(documents)}
+        extracted.sort(key=lambda item: upload_order[item[0]])
+        material = merge_ranked_chunks(extracted)
+        num_questions = options['num_questions']
+
+        try:
+            questions_data = generate_questions_from_material(
+                material, num_questions, options['difficulty'],
+                max_tokens=min(num_questions * 350, 8000)
+            )
+            quiz = self._create_quiz(options, options['title'] or 'Untitled Quiz', questions_data)
+        except Exception as e:
+            traceback.print_exc()
+            yield {'type': 'error', 'error': f'Failed to generate quiz: {e}'}
+            yield {'type': 'done', 'quizzes_created': 0}
+            return
+
+        yield self._quiz_event(quiz, [name for name, _ in extracted])
+        yield {'type': 'done', 'quizzes_created': 1}
+
 # ==================== QUIZ MANAGEMENT VIEWS ====================
 
+RECOMMENDATION_COUNT = 5
+RECOMMENDATION_CANDIDATES = 100
+
 class RecommendedQuizzes(APIView):
     """
     Generate personalized quiz recommendations for the logged-in user.
-    Recommendations are based on preferred categories, attempt history, and popularity.
+    Recommendations are based on preferred categories, attempt history, popularity
+    and quizzes taken by the same users.
+
+    Scoring runs on values() projections of the most popular
+    RECOMMENDATION_CANDIDATES quizzes of the most recent subject and of the
+    other recent subjects, so its cost doesn't grow with the catalogue. The
+    result is cached per user data version (submits bump it).
     """
     permission_classes = [IsAuthenticated]
 
+    @cache_user_response
     def get(self, request):
         try:
             user = request.user
@@ -1297,49 +1638,72 @@ class RecommendedQuizzes(APIView):
         # 1. Fetch user's preferred categories and recent activity
         preferred_category_names = [cat.strip() for cat in profile.category_preference.split(',') if cat.strip()]
         
-        # Get the most recent category from the user's last 5 attempts
-        recent_attempts = QuizAttempt.objects.filter(user=user, status='completed').order_by('-completed_at').select_related('quiz__category', 'quiz__subject')[:5]
-        
-        recent_categories = [attempt.quiz.category.name for attempt in recent_attempts if attempt.quiz.category]
-        most_recent_category = recent_categories[0] if recent_categories else None
+        # The user's last 5 completed attempts
+        recent_attempts = list(
+            QuizAttempt.objects.filter(user=user, status='completed').order_by('-completed_at')
+            .values('quiz_id', 'completed_at', subject_name=F('quiz__subject__name'))[:5]
+        )
 
-        recent_subjects = [attempt.quiz.subject.name for attempt in recent_attempts if attempt.quiz.subject]
+        recent_subjects = [attempt['subject_name'] for attempt in recent_attempts if attempt['subject_name']]
         most_recent_subject = recent_subjects[0] if recent_subjects else None
 
         # If user has no preferences or recent activity, return empty list (don't trigger recommendations)
         if not preferred_category_names and not recent_subjects:
             return Response([])
 
-        # 2. Fetch all quizzes and user's recent attempts
-        # STRICT MODE: Only fetch quizzes that match the user's recent SUBJECTS.
+        # 2. Candidate quizzes as compact projections
+        # STRICT MODE: Only consider quizzes that match the user's recent SUBJECTS.
         # This prevents "Chemistry" from showing up when user did "Biology".
-        all_quizzes = list(Quiz.objects.filter(
-            is_published=True,
-            is_temporary=False,
-            subject__name__in=recent_subjects # STRICT FILTER
-        ).select_related('category', 'subject'))
-        
-        attempted_quizzes_map = {attempt.quiz_id: attempt.completed_at for attempt in recent_attempts}
+        published = Quiz.objects.filter(is_published=True, is_temporary=False).order_by('-popularity_score')
+        fields = ('id', 'category_id', 'level_id', 'difficulty', 'popularity_score')
+        candidates = list(
+            published.filter(subject__name=most_recent_subject)
+            .values(*fields, category_name=F('category__name'))[:RECOMMENDATION_CANDIDATES]
+        ) if most_recent_subject else []
+        most_recent_count = len(candidates)
+        other_subjects = set(recent_subjects) - {most_recent_subject}
+        if other_subjects:
+            candidates += published.filter(subject__name__in=other_subjects) \
+                .values(*fields, category_name=F('category__name'))[:RECOMMENDATION_CANDIDATES]
+
+        # Quizzes often taken by the users who took the recent ones (precomputed by
+        # `manage.py build_quiz_neighbours`); these may come from other subjects
+        similarity = {}
+        for quiz_id, score in QuizNeighbour.objects.filter(
+            kind='cooccurrence', quiz_id__in=[attempt['quiz_id'] for attempt in recent_attempts]
+        ).values_list('neighbour_id', 'score'):
+            similarity[quiz_id] = max(similarity.get(quiz_id, 0), score)
+        missing_ids = set(similarity) - {quiz['id'] for quiz in candidates}
+        if missing_ids:
+            candidates += published.filter(id__in=missing_ids).values(*fields, category_name=F('category__name'))
+        
+        attempted_quizzes_map = {attempt['quiz_id']: attempt['completed_at'] for attempt in recent_attempts}
+        now = timezone.now()
+        current_weight = popularity_weight(now)
 
         # 3. Score each quiz
         scored_quizzes = []
-        for quiz in all_quizzes:
+        for index, quiz in enumerate(candidates):
             score = 0
             
             # Rule 1: Prioritize preferred categories (Keep as tie-breaker)
-            if quiz.category.name in preferred_category_names:
+            if quiz['category_name'] in preferred_category_names:
                 score += 10
             
-            # Rule 2: Boost for MOST recent subject
-            if quiz.subject.name == most_recent_subject:
+            # Rule 2: Boost for MOST recent subject (the first candidate group)
+            if index < most_recent_count:
                 score += 50 
             
-            # Rule 3: Factor in popularity
-            score += quiz.popularity_score
+            # Rule 3: Factor in popularity (recent completions)
+            if current_weight:
+                score += quiz['popularity_score'] / current_weight
+            
+            # Rule 4: Boost quizzes taken by the same users (similarity is 0..1)
+            score += 40 * similarity.get(quiz['id'], 0)
             
-            # Rule 4: Deprioritize recently attempted quizzes
-            if quiz.id in attempted_quizzes_map:
-                days_since_attempt = (timezone.now() - attempted_quizzes_map[quiz.id]).days
+            # Rule 5: Deprioritize recently attempted quizzes
+            if quiz['id'] in attempted_quizzes_map:
+                days_since_attempt = (now - attempted_quizzes_map[quiz['id']]).days
                 if days_since_attempt <= 1:
                     score -= 50
                 elif days_since_attempt <= 7:
@@ -1349,54 +1713,48 @@ class RecommendedQuizzes(APIView):
             else:
                 score += 10 # Bonus for unattempted quizzes
             
-            scored_quizzes.append({'quiz': quiz, 'score': score})
+            scored_quizzes.append((score, quiz))
 
         # 4. Sort quizzes by score
-        scored_quizzes.sort(key=lambda x: x['score'], reverse=True)
+        scored_quizzes.sort(key=lambda x: x[0], reverse=True)
         
-        # 5. Build the final list of recommendations
-        final_recommendations = []
-        recommended_ids = set()
+        # 5. Pick the final list, one quiz per category/level/difficulty
+        recommended_ids = []
         recommended_combos = set()
 
-        # Add from scored quizzes first
-        for item in scored_quizzes:
-            if len(final_recommendations) >= 5:
-                break
-            quiz = item['quiz']
-            combo = (quiz.category.id, quiz.level.id, quiz.difficulty)
-            if quiz.id not in recommended_ids and combo not in recommended_combos:
-                final_recommendations.append(quiz)
-                recommended_ids.add(quiz.id)
-                recommended_combos.add(combo)
-        
-        # If still fewer than 5, add trending quizzes
-        if len(final_recommendations) < 5:
-            trending_quizzes = Quiz.objects.filter(is_published=True) \
-                .exclude(id__in=recommended_ids) \
-                .order_by('-popularity_score')[:10]
-            
-            for quiz in trending_quizzes:
-                if len(final_recommendations) >= 5:
+        def pick(quizzes):
+            for quiz in quizzes:
+                if len(recommended_ids) >= RECOMMENDATION_COUNT:
                     break
-                combo = (quiz.category.id, quiz.level.id, quiz.difficulty)
-                if quiz.id not in recommended_ids and combo not in recommended_combos:
-                    final_recommendations.append(quiz)
-                    recommended_ids.add(quiz.id)
+                combo = (quiz['category_id'], quiz['level_id'], quiz['difficulty'])
+                if quiz['id'] not in recommended_ids and combo not in recommended_combos:
+                    recommended_ids.append(quiz['id'])
                     recommended_combos.add(combo)
 
+        # Add from scored quizzes first
+        pick(quiz for _, quiz in scored_quizzes)
+        
+        # If still fewer than 5, add trending quizzes (a top-K walk of the popularity index)
+        if len(recommended_ids) < RECOMMENDATION_COUNT:
+            pick(published.exclude(id__in=recommended_ids).values('id', 'category_id', 'level_id', 'difficulty')[:10])
+
         # 6. Return the final list
-        serializer = QuizListSerializer(final_recommendations, many=True)
+        quizzes = Quiz.objects.select_related('category', 'level', 'subject', 'created_by').in_bulk(recommended_ids)
+        serializer = QuizListSerializer([quizzes[quiz_id] for quiz_id in recommended_ids], many=True)
         return Response(serializer.data)
 
 class QuizListView(APIView):
-    """List all published quizzes"""
+    """
+    List published quizzes, newest first, with keyset pagination.
+
+    Query params: category, level, subject, difficulty (filters by name),
+    cursor and page_size (pagination). The first page also returns facet
+    counts per category, level, subject and difficulty for the filtered set.
+    """
     permission_classes = [AllowAny]
 
     def get(self, request):
-        quizzes = Quiz.objects.filter(is_published=True).select_related(
-            'category', 'level', 'subject', 'created_by'
-        )
+        quizzes = Quiz.objects.filter(is_published=True)
         
         # Filter by query params
         category = request.query_params.get('category')
@@ -1413,8 +1771,32 @@ class QuizListView(APIView):
         if difficulty:
             quizzes = quizzes.filter(difficulty=difficulty)
         
-        serializer = QuizListSerializer(quizzes, many=True)
-        return Response(serializer.data)
+        paginator = KeysetPagination()
+        page = paginator.paginate_queryset(
+            quizzes.select_related('category', 'level', 'subject', 'created_by'), request
+        )
+        serializer = QuizListSerializer(page, many=True)
+
+        extra = {}
+        if not paginator.has_cursor:
+            extra['facets'] = self._facets(quizzes)
+        return paginator.get_paginated_response(serializer.data, **extra)
+
+    @staticmethod
+    def _facets(quizzes):
+        """Counts per category, level, subject and difficulty from one grouped query"""
+        facets = {'category': {}, 'level': {}, 'subject': {}, 'difficulty': {}}
+        rows = quizzes.order_by().values(
+            'category__name', 'level__name', 'subject__name', 'difficulty'
+        ).annotate(count=Count('id'))
+        for row in rows:
+            for facet, key in (('category', 'category__name'), ('level', 'level__name'),
+                               ('subject', 'subject__name'), ('difficulty', 'difficulty')):
+                facets[facet][row[key]] = facets[facet].get(row[key], 0) + row['count']
+        return {
+            facet: [{'name': name, 'count': count} for name, count in sorted(counts.items())]
+            for facet, counts in facets.items()
+        }
 
 class QuizDetailView(APIView):
     """Get quiz details (for quiz creator/admin)"""
@@ -1428,6 +1810,35 @@ class QuizDetailView(APIView):
         except Quiz.DoesNotExist:
             return Response({'error': 'Quiz not found'}, status=status.HTTP_404_NOT_FOUND)
 
+SIMILAR_QUIZZES_DEFAULT_LIMIT = 5
+
+class SimilarQuizzesView(APIView):
+    """
+    Get published quizzes whose question text is most similar to a quiz's.
+
+    Served from the precomputed content neighbours (see similarity.py);
+    ?limit= sets the number of quizzes (default 5, max 10).
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, quiz_id):
+        if not Quiz.objects.filter(id=quiz_id).exists():
+            return Response({'error': 'Quiz not found'}, status=status.HTTP_404_NOT_FOUND)
+
+        limit = get_int_param(request, 'limit', SIMILAR_QUIZZES_DEFAULT_LIMIT, SIMILAR_QUIZ_NEIGHBOURS)
+        neighbours = QuizNeighbour.objects.filter(
+            kind='content', quiz_id=quiz_id, neighbour__is_published=True
+        ).select_related(
+            'neighbour__category', 'neighbour__level', 'neighbour__subject', 'neighbour__created_by'
+        ).order_by('-score')[:limit]
+
+        data = []
+        for neighbour in neighbours:
+            item = QuizListSerializer(neighbour.neighbour).data
+            item['similarity'] = round(neighbour.score, 3)
+            data.append(item)
+        return Response(data)
+
 class QuizTakeView(APIView):
     """
     Get quiz for taking.
@@ -1482,6 +1893,7 @@ class QuizStartView(APIView):
             total_questions=quiz.total_questions,
             status='in_progress'
         )
+        record_attempt_started(attempt)
         
         serializer = QuizAttemptSerializer(attempt)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
@@ -1500,74 +1912,39 @@ class QuizSubmitView(APIView):
         answers_data = serializer.validated_data['answers']
         time_taken = serializer.validated_data.get('time_taken', 0)
         
-        try:
-            attempt = QuizAttempt.objects.get(id=attempt_id, user=request.user, status='in_progress')
-        except QuizAttempt.DoesNotExist:
-            return Response({'error': 'Active quiz attempt not found'}, status=status.HTTP_404_NOT_FOUND)
-            
-        quiz = attempt.quiz
-
-        # Update attempt details
-        attempt.time_taken = time_taken
-        attempt.status = 'completed'
-        attempt.completed_at = timezone.now()
-        
-        # Save answers
-        for answer_data in answers_data:
+        # Grade, update stats and complete the attempt as one unit of work
+        with transaction.atomic():
             try:
-                question = Question.objects.get(id=answer_data['question_id'], quiz=quiz)
-                Answer.objects.create(
-                    attempt=attempt,
-                    question=question,
-                    selected_option=answer_data['selected_option']
+                attempt = QuizAttempt.objects.select_for_update().select_related('quiz', 'quiz__category', 'user').get(
+                    id=attempt_id, user=request.user, status='in_progress'
                 )
-            except Question.DoesNotExist:
-                continue
-        
-        # Calculate score
-        attempt.calculate_score()
-        
-        # If the quiz is temporary, don't update user profile stats
-        streak_lost = False
-        if not quiz.is_temporary:
-            # Update user profile
-            profile = request.user.profile
-            profile.total_quizzes_taken += 1
-            profile.total_questions_answered += attempt.total_questions
-            profile.total_correct_answers += attempt.correct_answers
-            profile.add_xp(attempt.xp_earned)
-            profile.update_streak()
-            
-            # Save profile to ensure stats are updated before signal handlers run
-            profile.save()
-            
-            streak_lost = getattr(profile, 'streak_was_just_reset', False)
+            except QuizAttempt.DoesNotExist:
+                return Response({'error': 'Active quiz attempt not found'}, status=status.HTTP_404_NOT_FOUND)
+                
+            quiz = attempt.quiz
+
+            # Update attempt details
+            attempt.time_taken = time_taken
+            attempt.status = 'completed'
+            attempt.completed_at = timezone.now()
             
-            # Update analytics
-            analytics, created = QuizAnalytics.objects.get_or_create(user=request.user)
-            analytics.total_quizzes_taken += 1
-            analytics.total_questions_answered += attempt.total_questions
-            analytics.total_correct_answers += attempt.correct_answers
+            # Save answers and calculate score against the answer key in one pass
+            grade_attempt(attempt, answers_data)
+            record_quiz_attempt_score(attempt)
+            record_subject_performance(attempt)
             
-            if quiz.difficulty == 'easy':
-                analytics.easy_quizzes_taken += 1
-            elif quiz.difficulty == 'medium':
-                analytics.medium_quizzes_taken += 1
+            # If the quiz is temporary, don't update user profile stats
+            if not quiz.is_temporary:
+                profile, streak_lost = record_attempt_stats(request.user, attempt)
+                record_xp_buckets(attempt)
             else:
-                analytics.hard_quizzes_taken += 1
-            
-            analytics.total_time_spent += time_taken
-            if analytics.total_quizzes_taken > 0:
-                analytics.average_quiz_time = analytics.total_time_spent // analytics.total_quizzes_taken
-            
-            analytics.save()
-        else:
-            profile = request.user.profile
-            streak_lost = False # Default value for temporary quizzes
+                record_profile_score(attempt)
+                profile = request.user.profile
+                streak_lost = False # Default value for temporary quizzes
 
-        # Save attempt (Triggers post_save signal for achievements)
-        # We do this AFTER profile update so checks see correct stats
-        attempt.save()
+            # Save attempt (Triggers post_save signal for achievements)
+            # We do this AFTER profile update so checks see correct stats
+            attempt.save()
 
         # Return results
         attempt_serializer = QuizAttemptSerializer(attempt)
@@ -1585,175 +1962,337 @@ class QuizSubmitView(APIView):
         }, status=status.HTTP_200_OK)
 
 class QuizAttemptDetailView(APIView):
-    """Get details of a specific quiz attempt"""
+    """Get details of a specific quiz attempt, including its answers"""
     permission_classes = [IsAuthenticated]
 
     def get(self, request, attempt_id):
         try:
-            attempt = QuizAttempt.objects.get(id=attempt_id, user=request.user)
+            attempt = QuizAttempt.objects.select_related('quiz', 'quiz__category', 'user').prefetch_related(
+                Prefetch('answers', queryset=Answer.objects.select_related('question'))
+            ).get(id=attempt_id, user=request.user)
             serializer = QuizAttemptSerializer(attempt)
             return Response(serializer.data)
         except QuizAttempt.DoesNotExist:
             return Response({'error': 'Attempt not found'}, status=status.HTTP_404_NOT_FOUND)
 
 class UserQuizHistoryView(APIView):
-    """Get user's quiz attempt history"""
+    """
+    Get user's quiz attempt history as lightweight summaries, newest first.
+
+    Rows are a values() projection without answers and are cursor-paginated
+    (cursor, page_size). Fetch answers from /quiz/attempts/<id>/.
+    """
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        attempts = QuizAttempt.objects.filter(user=request.user, quiz__is_temporary=False).select_related('quiz', 'quiz__category')
-        serializer = QuizAttemptSerializer(attempts, many=True)
-        return Response(serializer.data)
+        attempts = QuizAttempt.objects.filter(user=request.user, quiz__is_temporary=False).values(
+            'id', 'quiz', 'status', 'started_at', 'completed_at', 'time_taken', 'score',
+            'total_questions', 'correct_answers', 'score_percentage', 'xp_earned',
+            quiz_title=F('quiz__title'),
+            quiz_category=F('quiz__category__name'),
+            quiz_subject=F('quiz__subject__name'),
+            quiz_difficulty=F('quiz__difficulty'),
+        )
+        paginator = KeysetPagination(ordering_field='started_at')
+        page = paginator.paginate_queryset(attempts, request)
+        for row in page:
+            row['formatted_score_percentage'] = f"{row['score_percentage']:.1f}%"
+        return paginator.get_paginated_response(page)
 
 # ==================== ANALYTICS VIEWS ====================
 
+DASHBOARD_PANELS = (
+    'analytics', 'performance', 'overall', 'category_distribution', 'by_category', 'by_subject', 'progress'
+)
+
+def parse_activity_window(request):
+    """Read the optional ?from=/&to= (YYYY-MM-DD) activity window; raises ValueError if malformed"""
+    window = []
+    for param in ('from', 'to'):
+        value = request.query_params.get(param)
+        day = None
+        if value:
+            try:
+                day = parse_date(value)
+            except ValueError:
+                pass
+            if day is None:
+                raise ValueError(f"Invalid '{param}' date, expected YYYY-MM-DD")
+        window.append(day)
+    return window
+
+def get_activity_summary(user, start=None, end=None):
+    """
+    Streaks from the user's profile and active dates from their activity calendar.
+
+    activity_history lists the days ("YYYY-MM-DD", newest first) within the
+    optional start/end window on which the user completed a quiz.
+    """
+    profile = user.profile
+    calendar = get_activity_calendar(user)
+    return {
+        'streak_days': profile.get_effective_streak(),
+        'longest_streak': profile.longest_streak,
+        'activity_history': [day.strftime('%Y-%m-%d') for day in calendar.active_days(start, end)],
+    }
+
+def get_subject_performance_rows(user):
+    """
+    Load the user's SubjectPerformance rows as dicts.
+
+    Every performance panel is computed from these few rows (one per
+    category/subject the user has played) instead of the attempt history.
+    """
+    return list(SubjectPerformance.objects.filter(user=user).values(
+        'category_id', 'subject_id', 'attempt_count', 'score_sum', 'highest_score',
+        'last_score', 'last_attempt_at',
+        category_name=F('category__name'),
+        subject_name=F('subject__name'),
+        subject_category_id=F('subject__level__category_id'),
+        subject_level_name=F('subject__level__name'),
+    ))
+
+def group_performance_rows(rows, key):
+    """Sum attempt counts/scores and take the highest score of rows sharing `key`"""
+    groups = {}
+    for row in rows:
+        group = groups.setdefault(row[key], {'attempt_count': 0, 'score_sum': 0.0, 'highest_score': 0.0})
+        group['attempt_count'] += row['attempt_count']
+        group['score_sum'] += row['score_sum']
+        group['highest_score'] = max(group['highest_score'], row['highest_score'])
+    return groups
+
+def build_analytics_panel(analytics, activity):
+    """Analytics totals plus streaks and activity history"""
+    data = QuizAnalyticsSerializer(analytics).data
+    data.update(activity)
+    return data
+
+def build_performance_panel(user, analytics, rows, activity):
+    """Overall totals plus the latest score per category and per subject"""
+    profile = user.profile
+
+    total_correct_answers = analytics.total_correct_answers
+    total_questions_answered = analytics.total_questions_answered
+    total_incorrect_answers = total_questions_answered - total_correct_answers
+    
+    accuracy = (total_correct_answers / total_questions_answered * 100) if total_questions_answered > 0 else 0
+
+    # Each row carries the latest attempt of its category/subject, so "most
+    # recent per category/subject" needs no history scan
+    total_quizzes_completed = sum(row['attempt_count'] for row in rows)
+    dated_rows = [row for row in rows if row['last_attempt_at']]
+
+    def latest_by(key):
+        latest = {}
+        for row in dated_rows:
+            current = latest.get(row[key])
+            if current is None or row['last_attempt_at'] > current['last_attempt_at']:
+                latest[row[key]] = row
+        return latest
+
+    # Category-wise performance for the most recent quiz in each specified category
+    categories_to_check = ["Academics", "Computer Engineering", "Government Exams"]
+    latest_by_category = latest_by('category_name')
+    category_performance_list = [
+        {
+            'category': cat_name,
+            'average_score': latest_by_category[cat_name]['last_score']
+        }
+        for cat_name in categories_to_check if cat_name in latest_by_category
+    ]
+
+    category_wise_performance = {
+        'most_recent_quiz': {
+            'quiz_title': 'Most Recent Quizzes by Category',
+            'categories': category_performance_list
+        }
+    } if category_performance_list else None
+
+
+    # Subject-wise performance based on the category of the last quiz
+    subject_wise_performance = None
+
+    if dated_rows:
+        last_row = max(dated_rows, key=lambda row: row['last_attempt_at'])
+        last_category_id = last_row['category_id']
+
+        subject_rows = sorted(
+            (row for row in latest_by('subject_id').values() if row['subject_category_id'] == last_category_id),
+            key=lambda row: (row['subject_level_name'], row['subject_name'])
+        )
+        subject_performance_list = [
+            {
+                'subject': row['subject_name'],
+                'score': row['last_score']
+            }
+            for row in subject_rows
+        ]
+
+        subject_wise_performance = {
+            'most_recent_quiz': {
+                'quiz_title': f"Performance in {last_row['category_name']}",
+                'subjects': subject_performance_list
+            }
+        }
+
+    return {
+        'overall': {
+            'total_quizzes_attempted': profile.total_attempts,
+            'total_quizzes_completed': total_quizzes_completed,
+            'total_correct_answers': total_correct_answers,
+            'total_incorrect_answers': total_incorrect_answers,
+            'accuracy': accuracy,
+            'average_score': profile.average_score,
+            'highest_score': max((row['highest_score'] for row in rows), default=0),
+        },
+        'category_wise_performance': category_wise_performance,
+        'subject_wise_performance': subject_wise_performance,
+        'activity_history': activity['activity_history'],
+        'streak_days': activity['streak_days'],
+        'longest_streak': activity['longest_streak'],
+    }
+
+def build_overall_panel(rows):
+    """Average and highest score over all completed attempts"""
+    attempt_count = sum(row['attempt_count'] for row in rows)
+    if not attempt_count:
+        return {
+            'average_score': 0,
+            'highest_score': 0,
+        }
+
+    return {
+        'average_score': sum(row['score_sum'] for row in rows) / attempt_count,
+        'highest_score': max(row['highest_score'] for row in rows),
+    }
+
+def build_category_distribution_panel(rows):
+    """Number of completed quizzes per category, most played first"""
+    groups = group_performance_rows(rows, 'category_name')
+    data = [{'category': name, 'quiz_count': group['attempt_count']} for name, group in sorted(groups.items())]
+    data.sort(key=lambda item: item['quiz_count'], reverse=True)
+    return data
+
+def build_by_category_panel(rows):
+    """Average and highest score per category"""
+    groups = group_performance_rows(rows, 'category_name')
+    return [
+        {
+            'category': name,
+            'average_score': group['score_sum'] / group['attempt_count'],
+            'highest_score': group['highest_score']
+        } for name, group in sorted(groups.items()) if group['attempt_count']
+    ]
+
+def build_by_subject_panel(rows):
+    """Average score and quiz count per subject"""
+    groups = group_performance_rows(rows, 'subject_name')
+    return [
+        {
+            'subject': name,
+            'average_score': group['score_sum'] / group['attempt_count'],
+            'quiz_count': group['attempt_count']
+        } for name, group in sorted(groups.items()) if group['attempt_count']
+    ]
+
+def build_progress_panel(user):
+    """Scores of the last 15 completed quizzes in chronological order"""
+    progress_data = QuizAttempt.objects.filter(user=user, status='completed') \
+        .order_by('-completed_at')[:15] \
+        .values('quiz__title', 'score_percentage', 'completed_at')
+
+    # Reverse the data to show chronological order
+    data = sorted(progress_data, key=lambda x: x['completed_at'])
+
+    # Format the data for the chart
+    return [
+        {
+            'quiz_name': item['quiz__title'],
+            'score': item['score_percentage'],
+            'date': item['completed_at'].strftime('%Y-%m-%d')
+        } for item in data
+    ]
+
 class UserAnalyticsView(APIView):
-    """Get user analytics including streak and activity history"""
+    """Get user analytics including streak and activity history (?from=&to= limit the history)"""
     permission_classes = [IsAuthenticated]
 
+    @cache_user_response
     def get(self, request):
+        try:
+            start, end = parse_activity_window(request)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
         user = request.user
-        profile = user.profile
-        
-        # 1. Update/Check Streak
-        profile.check_streak()
-        
-        # 2. Get Analytics Base Data
         analytics, created = QuizAnalytics.objects.get_or_create(user=user)
-        base_serializer = QuizAnalyticsSerializer(analytics)
-        
-        # 3. Get Activity History
-        from django.db.models.functions import TruncDate
-        activity_dates = QuizAttempt.objects.filter(
-            user=user, 
-            status='completed'
-        ).annotate(
-            date=TruncDate('completed_at')
-        ).values('date').distinct().order_by('-date')
-        
-        activity_history = [
-            item['date'].strftime('%Y-%m-%d') 
-            for item in activity_dates 
-            if item['date']
-        ]
-
-        # 4. Combine Data
-        data = base_serializer.data
-        data.update({
-            'streak_days': profile.current_streak,
-            'longest_streak': profile.longest_streak,
-            'activity_history': activity_history
-        })
-        
-        return Response(data)
+        return Response(build_analytics_panel(analytics, get_activity_summary(user, start, end)))
 
 class UserPerformanceView(APIView):
-    """Get user performance data"""
+    """Get user performance data (?from=&to= limit the activity history)"""
     permission_classes = [IsAuthenticated]
 
+    @cache_user_response
     def get(self, request):
+        try:
+            start, end = parse_activity_window(request)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
         user = request.user
-        profile = user.profile
         analytics, created = QuizAnalytics.objects.get_or_create(user=user)
+        return Response(build_performance_panel(
+            user, analytics, get_subject_performance_rows(user), get_activity_summary(user, start, end)
+        ))
 
-        total_quizzes_attempted = QuizAttempt.objects.filter(user=user).count()
-        total_quizzes_completed = QuizAttempt.objects.filter(user=user, status='completed').count()
-        
-        total_correct_answers = analytics.total_correct_answers
-        total_questions_answered = analytics.total_questions_answered
-        total_incorrect_answers = total_questions_answered - total_correct_answers
-        
-        accuracy = (total_correct_answers / total_questions_answered * 100) if total_questions_answered > 0 else 0
-
-        # Category-wise performance for the most recent quiz in each specified category
-        categories_to_check = ["Academics", "Computer Engineering", "Government Exams"]
-        category_performance_list = []
-        
-        for cat_name in categories_to_check:
-            last_attempt_in_cat = QuizAttempt.objects.filter(
-                user=user, 
-                status='completed', 
-                quiz__category__name=cat_name
-            ).order_by('-completed_at').first()
-            
-            if last_attempt_in_cat:
-                category_performance_list.append({
-                    'category': cat_name,
-                    'average_score': last_attempt_in_cat.score_percentage
-                })
-
-        category_wise_performance = {
-            'most_recent_quiz': {
-                'quiz_title': 'Most Recent Quizzes by Category',
-                'categories': category_performance_list
-            }
-        } if category_performance_list else None
-
-
-        # Subject-wise performance based on the category of the last quiz
-        last_attempt = QuizAttempt.objects.filter(user=user, status='completed').order_by('-completed_at').first()
-        subject_wise_performance = None
-
-        if last_attempt:
-            last_quiz_category = last_attempt.quiz.category
-            subjects_in_category = Subject.objects.filter(level__category=last_quiz_category)
-            
-            subject_performance_list = []
-            for subject in subjects_in_category:
-                last_attempt_for_subject = QuizAttempt.objects.filter(
-                    user=user,
-                    status='completed',
-                    quiz__subject=subject
-                ).order_by('-completed_at').first()
-
-                if last_attempt_for_subject:
-                    subject_performance_list.append({
-                        'subject': subject.name,
-                        'score': last_attempt_for_subject.score_percentage
-                    })
+class UserDashboardView(APIView):
+    """
+    Get every performance dashboard panel in one response.
 
-            subject_wise_performance = {
-                'most_recent_quiz': {
-                    'quiz_title': f'Performance in {last_quiz_category.name}',
-                    'subjects': subject_performance_list
-                }
-            }
+    Pass ?fields=overall,progress to build only some panels, and ?from=&to=
+    to limit the activity history. Panels share the user's subject stats rows,
+    analytics row and activity calendar, each loaded at most once.
+    """
+    permission_classes = [IsAuthenticated]
 
+    @cache_user_response
+    def get(self, request):
+        user = request.user
+        fields = request.query_params.get('fields')
+        if fields:
+            requested = {field.strip() for field in fields.split(',') if field.strip()}
+            unknown = requested.difference(DASHBOARD_PANELS)
+            if unknown:
+                return Response(
+                    {'error': f"Unknown dashboard fields: {', '.join(sorted(unknown))}"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+        else:
+            requested = set(DASHBOARD_PANELS)
 
-        # Get activity history (dates of completed quizzes)
-        from django.db.models.functions import TruncDate
-        
-        activity_dates = QuizAttempt.objects.filter(
-            user=user, 
-            status='completed'
-        ).annotate(
-            date=TruncDate('completed_at')
-        ).values('date').distinct().order_by('-date')
-        
-        # Convert to list of strings "YYYY-MM-DD"
-        activity_history = [
-            item['date'].strftime('%Y-%m-%d') 
-            for item in activity_dates 
-            if item['date']
-        ]
+        try:
+            start, end = parse_activity_window(request)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-        data = {
-            'overall': {
-                'total_quizzes_attempted': total_quizzes_attempted,
-                'total_quizzes_completed': total_quizzes_completed,
-                'total_correct_answers': total_correct_answers,
-                'total_incorrect_answers': total_incorrect_answers,
-                'accuracy': accuracy,
-                'average_score': profile.average_score,
-                'highest_score': QuizAttempt.objects.filter(user=user, status='completed').aggregate(Avg('score_percentage'))['score_percentage__avg'] or 0,
-            },
-            'category_wise_performance': category_wise_performance,
-            'subject_wise_performance': subject_wise_performance,
-            'activity_history': activity_history,
-            'streak_days': profile.current_streak,
-            'longest_streak': profile.longest_streak,
+        analytics = rows = activity = None
+        if requested & {'analytics', 'performance'}:
+            analytics, created = QuizAnalytics.objects.get_or_create(user=user)
+            activity = get_activity_summary(user, start, end)
+        if requested - {'analytics', 'progress'}:
+            rows = get_subject_performance_rows(user)
+
+        builders = {
+            'analytics': lambda: build_analytics_panel(analytics, activity),
+            'performance': lambda: build_performance_panel(user, analytics, rows, activity),
+            'overall': lambda: build_overall_panel(rows),
+            'category_distribution': lambda: build_category_distribution_panel(rows),
+            'by_category': lambda: build_by_category_panel(rows),
+            'by_subject': lambda: build_by_subject_panel(rows),
+            'progress': lambda: build_progress_panel(user),
         }
-        return Response(data)
+        return Response({panel: builders[panel]() for panel in DASHBOARD_PANELS if panel in requested})
 
 # ==================== PERFORMANCE DASHBOARD VIEWS ====================
 
@@ -1761,124 +2300,48 @@ class OverallPerformanceMetricsView(APIView):
     """Get overall performance metrics for the authenticated user."""
     permission_classes = [IsAuthenticated]
 
+    @cache_user_response
     def get(self, request):
-        user = request.user
-        completed_attempts = QuizAttempt.objects.filter(user=user, status='completed')
-
-        if not completed_attempts.exists():
-            return Response({
-                'average_score': 0,
-                'highest_score': 0,
-            })
-
-        aggregates = completed_attempts.aggregate(
-            average_score=Avg('score_percentage'),
-            highest_score=Max('score_percentage')
-        )
-
-        return Response({
-            'average_score': aggregates['average_score'] or 0,
-            'highest_score': aggregates['highest_score'] or 0,
-        })
+        return Response(build_overall_panel(get_subject_performance_rows(request.user)))
 
 class CategoryDistributionView(APIView):
     """Get the distribution of quizzes played across different categories."""
     permission_classes = [IsAuthenticated]
 
+    @cache_user_response
     def get(self, request):
-        user = request.user
-        category_data = QuizAttempt.objects.filter(user=user, status='completed') \
-            .values('quiz__category__name') \
-            .annotate(quiz_count=Count('id')) \
-            .order_by('-quiz_count')
-
-        # Rename keys for consistency
-        data = [{'category': item['quiz__category__name'], 'quiz_count': item['quiz_count']} for item in category_data if item['quiz__category__name']]
-        
-        return Response(data)
+        return Response(build_category_distribution_panel(get_subject_performance_rows(request.user)))
 
 class PerformanceByCategoryView(APIView):
     """Get average and highest scores for each quiz category."""
     permission_classes = [IsAuthenticated]
 
+    @cache_user_response
     def get(self, request):
-        user = request.user
-        performance_data = QuizAttempt.objects.filter(user=user, status='completed') \
-            .values('quiz__category__name') \
-            .annotate(
-                average_score=Avg('score_percentage'),
-                highest_score=Max('score_percentage')
-            ) \
-            .order_by('quiz__category__name')
-
-        # Rename key for consistency
-        data = [
-            {
-                'category': item['quiz__category__name'],
-                'average_score': item['average_score'],
-                'highest_score': item['highest_score']
-            } for item in performance_data if item['quiz__category__name']
-        ]
-
-        return Response(data)
+        return Response(build_by_category_panel(get_subject_performance_rows(request.user)))
 
 class PerformanceBySubjectView(APIView):
     """Get average and highest scores for each quiz subject (topic)."""
     permission_classes = [IsAuthenticated]
 
+    @cache_user_response
     def get(self, request):
-        user = request.user
-        performance_data = QuizAttempt.objects.filter(user=user, status='completed') \
-            .values('quiz__subject__name') \
-            .annotate(
-                average_score=Avg('score_percentage'),
-                quiz_count=Count('id')
-            ) \
-            .order_by('quiz__subject__name')
-
-        # Rename key for consistency
-        data = [
-            {
-                'subject': item['quiz__subject__name'],
-                'average_score': item['average_score'],
-                'quiz_count': item['quiz_count']
-            } for item in performance_data if item['quiz__subject__name']
-        ]
-
-        return Response(data)
+        return Response(build_by_subject_panel(get_subject_performance_rows(request.user)))
 
 class UserProgressView(APIView):
     """Get user's score progression over the last 15 quizzes."""
     permission_classes = [IsAuthenticated]
 
+    @cache_user_response
     def get(self, request):
-        user = request.user
-        progress_data = QuizAttempt.objects.filter(user=user, status='completed') \
-            .order_by('-completed_at')[:15] \
-            .values('quiz__title', 'score_percentage', 'completed_at')
-
-        # Reverse the data to show chronological order
-        data = sorted(progress_data, key=lambda x: x['completed_at'])
-
-        # Format the data for the chart
-        formatted_data = [
-            {
-                'quiz_name': item['quiz__title'],
-                'score': item['score_percentage'],
-                'date': item['completed_at'].strftime('%Y-%m-%d')
-            } for item in data
-        ]
-
-        return Response(formatted_data)
+        return Response(build_progress_panel(request.user))
 
 class RecentActivityView(APIView):
     """Get recent user activity"""
     permission_classes = [IsAuthenticated]
 
-    def get(self, request):
-        user = request.user
-        now = timezone.now()
-        
+    def get_recent_activities(self, user):
+        """The 7 latest attempts, created quizzes and unlocked achievements (with date_obj)"""
         activities = []
 
         # 1. Recent quiz attempts
@@ -1962,7 +2425,14 @@ class RecentActivityView(APIView):
             print(f"Error sorting activities: {e}")
         
         # Take the top 7 most recent activities
-        recent_activities = activities[:7]
+        return activities[:7]
+
+    def get(self, request):
+        now = timezone.now()
+        # Cached without the relative dates, which are formatted per request
+        recent_activities = get_user_cached(
+            'recent_activity', request.user, lambda: self.get_recent_activities(request.user)
+        )
         
         # Format date for display
         for activity in recent_activities:
@@ -2006,11 +2476,43 @@ class UserAchievementsView(APIView):
     """Get user's unlocked achievements"""
     permission_classes = [IsAuthenticated]
 
+    @cache_user_response
     def get(self, request):
         user_achievements = UserAchievement.objects.filter(user=request.user)
         serializer = UserAchievementSerializer(user_achievements, many=True)
         return Response(serializer.data)
 
+class UserAchievementProgressView(APIView):
+    """
+    Get the user's progress towards every achievement.
+
+    Computed from the profile counters and the cached achievement catalog,
+    so it runs no per-achievement queries. Cached per user and catalog
+    version, so catalog changes show up without a profile change.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        return Response(get_user_cached(
+            'achievement_progress', request.user, lambda: self.get_progress(request.user),
+            variant=achievement_catalog_version()
+        ))
+
+    def get_progress(self, user):
+        progress = achievement_progress(user.profile)
+        serialized = AchievementSerializer([achievement for achievement, _, _ in progress], many=True).data
+        data = []
+        for achievement_data, (achievement, current, unlocked) in zip(serialized, progress):
+            target = achievement.criteria_value
+            data.append({
+                **achievement_data,
+                'current_value': current,
+                'target_value': target,
+                'progress_percentage': 100.0 if unlocked or target <= 0 else round(min(current / target, 1) * 100, 1),
+                'unlocked': unlocked,
+            })
+        return data
+
 class QuizMetadataView(APIView):
     permission_classes = [AllowAny]
     
@@ -2051,23 +2553,99 @@ class DeleteAccountView(APIView):
         user.delete()
         return Response({"message": "Account deleted successfully"}, status=status.HTTP_204_NO_CONTENT)
 
+LEADERBOARD_DEFAULT_LIMIT = 10
+LEADERBOARD_MAX_LIMIT = 100
+LEADERBOARD_MAX_NEIGHBOURS = 10
+
+def get_int_param(request, name, default, maximum):
+    """Read a non-negative integer query param, falling back to `default` and capped at `maximum`"""
+    try:
+        value = int(request.query_params.get(name, default))
+    except (TypeError, ValueError):
+        return default
+    return max(0, min(value, maximum))
+
+def build_leaderboard_entries(request, ranked, period_xp=None):
+    """
+    Leaderboard rows for [(rank, user_id)], loading the users with one query.
+
+    `period_xp` maps user ids to their XP in a windowed/scoped board.
+    """
+    users = User.objects.select_related('profile').in_bulk([user_id for _, user_id in ranked])
+    data = []
+    for rank, user_id in ranked:
+        user = users.get(user_id)
+        if user is None:
+            continue
+        profile_picture = None
+        if user.profile.profile_picture:
+            profile_picture = request.build_absolute_uri(user.profile.profile_picture.url)
+
+        data.append({
+            'rank': rank,
+            'id': user.id,
+            'username': user.username,
+            'xp': user.profile.xp,
+            'avatar': user.username[:2].upper(),
+            'level': user.profile.level,
+            'profile_picture': profile_picture
+        })
+        if period_xp is not None:
+            data[-1]['period_xp'] = period_xp[user_id]
+    return data
+
 class LeaderboardView(APIView):
-    """Get global leaderboard"""
+    """
+    Get global leaderboard.
+
+    By default the top public profiles by total XP (level, then XP into the
+    level), served from the in-process leaderboard index. ?period=week|month
+    ranks by quiz XP earned in the current week/month and ?category=<id> or
+    ?subject=<id> by quiz XP in that category/subject, from the XP buckets.
+    ?limit= sets the size (default 10).
+    """
     def get(self, request):
-        # Top 10 users by XP, only showing public profiles
-        top_users = User.objects.filter(profile__is_public_profile=True).select_related('profile').order_by('-profile__xp')[:10]
-        data = []
-        for user in top_users:
-            profile_picture = None
-            if user.profile.profile_picture:
-                profile_picture = request.build_absolute_uri(user.profile.profile_picture.url)
-            
-            data.append({
-                'id': user.id,
-                'username': user.username,
-                'xp': user.profile.xp,
-                'avatar': user.username[:2].upper(),
-                'level': user.profile.xp // 100 + 1,
-                'profile_picture': profile_picture
-            })
-        return Response(data)
+        limit = get_int_param(request, 'limit', LEADERBOARD_DEFAULT_LIMIT, LEADERBOARD_MAX_LIMIT)
+        period = request.query_params.get('period', 'all')
+        if period not in XPBucket.PERIODS:
+            return Response({'error': "Invalid 'period', expected week, month or all"}, status=status.HTTP_400_BAD_REQUEST)
+
+        scopes = [(scope, request.query_params.get(scope)) for scope in ('category', 'subject')]
+        scopes = [(scope, value) for scope, value in scopes if value]
+        if len(scopes) > 1:
+            return Response({'error': "Pass either 'category' or 'subject', not both"}, status=status.HTTP_400_BAD_REQUEST)
+        scope, scope_id = 'global', 0
+        if scopes:
+            scope, value = scopes[0]
+            try:
+                scope_id = int(value)
+            except ValueError:
+                return Response({'error': f"Invalid '{scope}', expected an id"}, status=status.HTTP_400_BAD_REQUEST)
+
+        if period == 'all' and scope == 'global':
+            return Response(build_leaderboard_entries(request, leaderboard.top(limit)))
+
+        leaders = scoped_leaderboard(period, scope, scope_id)[:limit]
+        ranked = [(index + 1, user_id) for index, (user_id, _) in enumerate(leaders)]
+        return Response(build_leaderboard_entries(request, ranked, period_xp=dict(leaders)))
+
+class LeaderboardRankView(APIView):
+    """
+    Get the user's leaderboard rank, percentile and the players around them.
+
+    ?neighbours= sets how many players to include on either side (default 2).
+    Users with a private profile are ranked where they would appear.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        neighbours = get_int_param(request, 'neighbours', 2, LEADERBOARD_MAX_NEIGHBOURS)
+        profile = request.user.profile
+        rank, total, ranked = leaderboard.around(request.user.pk, profile.level, profile.xp, neighbours)
+        return Response({
+            'rank': rank,
+            'total': total,
+            'percentile': round((total - rank + 1) / total * 100, 1),
+            'is_public': profile.is_public_profile,
+            'entries': build_leaderboard_entries(request, ranked),
+        })
@@ -63,6 +63,22 @@ DATABASES = {
     }
 }
 
+# Cache Configuration
+# In-process cache for per-user responses; MAX_ENTRIES bounds its memory
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'quiz-app-cache',
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.getenv('CACHE_MAX_ENTRIES', '5000')),
+        },
+    }
+}
+
+# Achievement events are evaluated after commit on a background worker;
+# set to False to evaluate them inline right after commit instead
+ACHIEVEMENT_EVENTS_ASYNC = os.getenv('ACHIEVEMENT_EVENTS_ASYNC', 'True') == 'True'
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -48,7 +48,7 @@ def verify_system():
     print("\nTesting 'First Steps' Badge...")
     # Manually set the stat
     user.profile.total_quizzes_taken = 1
-    user.profile.save()
+    user.profile.save(update_fields=['total_quizzes_taken'])
     
     new_badges = check_achievements(user, 'quiz_completed')
     if any(b.title == 'First Steps' for b in new_badges):
@@ -59,7 +59,7 @@ def verify_system():
     # 4. Test 'Quiz Master' (Create 10 Quizzes)
     print("\nTesting 'Quiz Master' Badge...")
     user.profile.total_quizzes_created = 10
-    user.profile.save()
+    user.profile.save(update_fields=['total_quizzes_created'])
     
     new_badges = check_achievements(user, 'quiz_created')
     if any(b.title == 'Quiz Master' for b in new_badges):
@@ -56,21 +56,16 @@ const PerformanceDashboard: React.FC = () => {
     const fetchData = async () => {
       try {
         setLoading(true);
-        const [
-          overallPerf,
-          catDist,
-          perfBySub,
-          userProg
-        ] = await Promise.all([
-          userAPI.getOverallPerformance(),
-          userAPI.getCategoryDistribution(),
-          userAPI.getPerformanceBySubject(),
-          userAPI.getUserProgress()
+        const dashboard = await userAPI.getDashboard([
+          'overall',
+          'category_distribution',
+          'by_subject',
+          'progress'
         ]);
-        setOverallPerformance(overallPerf);
-        setCategoryDistribution(catDist);
-        setPerformanceBySubject(perfBySub);
-        setUserProgress(userProg);
+        setOverallPerformance(dashboard.overall);
+        setCategoryDistribution(dashboard.category_distribution);
+        setPerformanceBySubject(dashboard.by_subject);
+        setUserProgress(dashboard.progress);
       } catch (err: any) {
         setError(err.message || 'Failed to fetch performance data');
       } finally {
@@ -165,6 +165,15 @@ export const userAPI = {
     return response.json();
   },
 
+  getDashboard: async (fields?: string[]) => {
+    const query = fields && fields.length ? `?fields=${fields.join(',')}` : '';
+    const response = await fetch(`${API_BASE_URL}/user/dashboard/${query}`, {
+      headers: getAuthHeaders()
+    });
+    if (!response.ok) throw new Error('Failed to fetch dashboard');
+    return response.json();
+  },
+
   getOverallPerformance: async () => {
     const response = await fetch(`${API_BASE_URL}/user/performance/overall/`, {
       headers: getAuthHeaders()
@@ -227,6 +236,14 @@ export const userAPI = {
     });
     if (!response.ok) throw new Error('Failed to fetch user achievements');
     return response.json();
+  },
+
+  getAchievementProgress: async () => {
+    const response = await fetch(`${API_BASE_URL}/user/achievements/progress/`, {
+      headers: getAuthHeaders()
+    });
+    if (!response.ok) throw new Error('Failed to fetch achievement progress');
+    return response.json();
   }
 };
 
@@ -399,6 +416,16 @@ export const quizAPI = {
     return response.json();
   },
 
+  // Get quizzes with similar question content
+  getSimilarQuizzes: async (quizId: number, limit?: number) => {
+    const query = limit ? `?limit=${limit}` : '';
+    const response = await fetch(`${API_BASE_URL}/quizzes/${quizId}/similar/${query}`, {
+      headers: getAuthHeaders()
+    });
+    if (!response.ok) throw new Error('Failed to fetch similar quizzes');
+    return response.json();
+  },
+
   // Start quiz attempt
   startQuiz: async (quizId: number) => {
     const response = await fetch(`${API_BASE_URL}/quiz/start/`, {